@@ -0,0 +1,128 @@
+"""Пропускная способность sync (WSGI) и async (ASGI) эндпоинтов чтения
+
+Оба приложения вызываются в процессе, без сети: WSGI - пулом потоков,
+ASGI - пачкой корутин в одном event loop, с одинаковой конкуренцией.
+База берётся из текущих настроек (DJANGO_SETTINGS_MODULE), данные должны
+быть загружены заранее.
+
+    DJANGO_ENV=dev python benchmarks/asgi_vs_wsgi.py --requests 2000 --concurrency 50
+"""
+import argparse
+import asyncio
+import io
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'diplom.settings')
+
+PAIRS = (
+    ('/api/v1/products/', '/api/v1/async/products/'),
+    ('/api/v1/product-collections/', '/api/v1/async/product-collections/'),
+)
+
+
+def wsgi_call(application, url):
+    parts = urlsplit(url)
+    environ = {
+        'REQUEST_METHOD': 'GET', 'PATH_INFO': parts.path, 'QUERY_STRING': parts.query,
+        'SERVER_NAME': 'localhost', 'SERVER_PORT': '80', 'SERVER_PROTOCOL': 'HTTP/1.1',
+        'wsgi.input': io.BytesIO(), 'wsgi.errors': sys.stderr, 'wsgi.url_scheme': 'http',
+        'wsgi.version': (1, 0), 'wsgi.multithread': True, 'wsgi.multiprocess': False,
+        'wsgi.run_once': False,
+    }
+    status = []
+    body = application(environ, lambda code, headers: status.append(code))
+    try:
+        b''.join(body)
+    finally:
+        getattr(body, 'close', lambda: None)()
+    return int(status[0].split()[0])
+
+
+async def asgi_call(application, url):
+    parts = urlsplit(url)
+    scope = {
+        'type': 'http', 'asgi': {'version': '3.0'}, 'http_version': '1.1', 'method': 'GET',
+        'scheme': 'http', 'path': parts.path, 'raw_path': parts.path.encode(),
+        'query_string': parts.query.encode(), 'headers': [(b'host', b'localhost')],
+        'server': ('localhost', 80), 'client': ('127.0.0.1', 0),
+    }
+    messages = []
+    requested = False
+    finished = asyncio.Event()
+
+    async def receive():
+        nonlocal requested
+        if not requested:
+            requested = True
+            return {'type': 'http.request', 'body': b'', 'more_body': False}
+        await finished.wait()
+        return {'type': 'http.disconnect'}
+
+    async def send(message):
+        messages.append(message)
+        if message['type'] == 'http.response.body' and not message.get('more_body'):
+            finished.set()
+
+    await application(scope, receive, send)
+    return messages[0]['status']
+
+
+def bench_wsgi(url, requests, concurrency):
+    from django.core.wsgi import get_wsgi_application
+
+    application = get_wsgi_application()
+    wsgi_call(application, url)
+    start = time.perf_counter()
+    with ThreadPoolExecutor(concurrency) as pool:
+        statuses = list(pool.map(lambda _: wsgi_call(application, url), range(requests)))
+    return time.perf_counter() - start, statuses
+
+
+def bench_asgi(url, requests, concurrency):
+    from django.core.asgi import get_asgi_application
+
+    application = get_asgi_application()
+
+    async def run():
+        await asgi_call(application, url)
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def one():
+            async with semaphore:
+                return await asgi_call(application, url)
+
+        start = time.perf_counter()
+        statuses = await asyncio.gather(*(one() for _ in range(requests)))
+        return time.perf_counter() - start, statuses
+
+    return asyncio.run(run())
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--requests', type=int, default=1000)
+    parser.add_argument('--concurrency', type=int, default=50)
+    args = parser.parse_args()
+
+    import django
+    from django.conf import settings
+
+    django.setup()
+    settings.ALLOWED_HOSTS = ['localhost']
+    settings.DB_INSTRUMENTATION_SAMPLE_RATE = 0
+
+    print(f'{"endpoint":<40}{"mode":>6}{"req/s":>10}{"errors":>8}')
+    for sync_url, async_url in PAIRS:
+        for mode, url, bench in (('wsgi', sync_url, bench_wsgi), ('asgi', async_url, bench_asgi)):
+            elapsed, statuses = bench(url, args.requests, args.concurrency)
+            errors = sum(status != 200 for status in statuses)
+            print(f'{url:<40}{mode:>6}{args.requests / elapsed:>10.1f}{errors:>8}')
+
+
+if __name__ == '__main__':
+    main()
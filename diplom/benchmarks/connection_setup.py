@@ -0,0 +1,70 @@
+"""Стоимость установки соединения с БД на запрос
+
+Имитирует цикл запроса (close_old_connections до и после, как сигналы
+request_started/request_finished) с одним коротким запросом внутри и
+сравнивает режимы: новое соединение на запрос (CONN_MAX_AGE = 0),
+постоянное соединение с проверкой CONN_HEALTH_CHECKS и без неё.
+База берётся из текущих настроек (DJANGO_SETTINGS_MODULE).
+
+    DJANGO_ENV=dev python benchmarks/connection_setup.py --requests 500
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'diplom.settings')
+
+MODES = (
+    ('new connection per request', {'CONN_MAX_AGE': 0, 'CONN_HEALTH_CHECKS': False}),
+    ('persistent + health checks', {'CONN_MAX_AGE': 600, 'CONN_HEALTH_CHECKS': True}),
+    ('persistent', {'CONN_MAX_AGE': 600, 'CONN_HEALTH_CHECKS': False}),
+)
+
+
+def run(connection, requests):
+    from django.db import close_old_connections
+
+    timings = []
+    for _ in range(requests):
+        start = time.perf_counter()
+        close_old_connections()
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT 1')
+            cursor.fetchone()
+        close_old_connections()
+        timings.append((time.perf_counter() - start) * 1000)
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--requests', type=int, default=500)
+    parser.add_argument('--database', default='default')
+    args = parser.parse_args()
+
+    import django
+    from django.db import connections
+
+    django.setup()
+    connection = connections[args.database]
+    if connection.settings_dict['OPTIONS'].get('pool'):
+        print('DB_POOL_MODE=psycopg: соединения выдаёт пул, замеряется только он')
+        modes = (('psycopg pool', {}),)
+    else:
+        modes = MODES
+
+    print(f'{"mode":<32}{"p50, ms":>10}{"p95, ms":>10}{"mean, ms":>10}')
+    for label, overrides in modes:
+        connection.close()
+        connection.settings_dict.update(overrides)
+        timings = sorted(run(connection, args.requests))
+        p95 = timings[int(len(timings) * 0.95) - 1]
+        print(f'{label:<32}{statistics.median(timings):>10.3f}{p95:>10.3f}{statistics.fmean(timings):>10.3f}')
+    connection.close()
+
+
+if __name__ == '__main__':
+    main()
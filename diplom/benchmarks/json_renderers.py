@@ -0,0 +1,86 @@
+"""Рендеринг и разбор JSON: стандартный json DRF против orjson
+
+Строит в памяти (без БД) N товаров и N заказов с позициями, сериализует их
+ProductSerializer/OrdersSerializer и замеряет JSONRenderer/FastJSONRenderer
+и JSONParser/FastJSONParser на получившихся данных.
+
+    DJANGO_ENV=dev python benchmarks/json_renderers.py --objects 10000 --repeat 5
+"""
+import argparse
+import io
+import os
+import statistics
+import sys
+import time
+from datetime import timedelta
+from decimal import Decimal
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'diplom.settings')
+
+
+def build_payloads(count):
+    from django.utils import timezone
+    from online_shop.models import Orders, ProductOrder, Products
+    from online_shop.serializers import OrdersSerializer, ProductSerializer
+
+    now = timezone.now()
+    products = [
+        Products(id=i, name=f'Товар {i}', description='Описание товара ' * 5, price=Decimal(100 + i % 900),
+                 stock=i % 50, rating_avg=Decimal('4.25'), rating_count=i % 30,
+                 created_at=now - timedelta(minutes=i), updated_at=now)
+        for i in range(1, count + 1)
+    ]
+    orders = []
+    for i in range(1, count + 1):
+        order = Orders(id=i, user_id=1, status='NEW', price_cart=0, created_at=now - timedelta(minutes=i), updated_at=now)
+        positions = [ProductOrder(order=order, product=products[(i + k) % count], quantity=k + 1) for k in range(3)]
+        # Связи из кеша prefetch, как после prefetch_related во ViewSet
+        order._prefetched_objects_cache = {'positions': positions,
+                                           'cart': [position.product for position in positions]}
+        orders.append(order)
+
+    return {
+        'ProductSerializer': ProductSerializer(products, many=True).data,
+        'OrdersSerializer': OrdersSerializer(orders, many=True).data,
+    }
+
+
+def measure(func, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--objects', type=int, default=10000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    import django
+
+    django.setup()
+    from rest_framework.parsers import JSONParser
+    from rest_framework.renderers import JSONRenderer
+    from online_shop.parsers import FastJSONParser
+    from online_shop.renderers import FastJSONRenderer, orjson
+
+    if orjson is None:
+        print('orjson не установлен: FastJSONRenderer работает через стандартный json')
+
+    print(f'{"payload":<20}{"codec":<10}{"render, ms":>12}{"parse, ms":>12}{"size, KB":>10}')
+    for label, data in build_payloads(args.objects).items():
+        for codec, renderer, json_parser in (('json', JSONRenderer(), JSONParser()),
+                                             ('orjson', FastJSONRenderer(), FastJSONParser())):
+            content = renderer.render(data)
+            render = measure(lambda: renderer.render(data), args.repeat)
+            parse = measure(lambda: json_parser.parse(io.BytesIO(content)), args.repeat)
+            print(f'{label:<20}{codec:<10}{render:>12.1f}{parse:>12.1f}{len(content) / 1024:>10.0f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,50 @@
+"""Переиспользование соединений с PostgreSQL, настраивается окружением
+
+DB_POOL_MODE:
+    ''         постоянные соединения: CONN_MAX_AGE = DB_CONN_MAX_AGE (60 с)
+               и проверка соединения в начале запроса;
+    psycopg    пул psycopg 3 внутри процесса (Django >= 5.1, psycopg[pool]),
+               размер DB_POOL_MIN_SIZE..DB_POOL_MAX_SIZE;
+    pgbouncer  постоянные соединения с pgbouncer в режиме pool_mode=transaction:
+               без подготовленных выражений psycopg 3, состояние сессии
+               в online_shop не используется.
+
+Под ASGI постоянные соединения не переиспользуются между запросами
+(каждый запрос работает в своём потоке), там нужен пул.
+"""
+import importlib.util
+
+from django.core.exceptions import ImproperlyConfigured
+
+POOL_MODES = ('', 'psycopg', 'pgbouncer')
+
+
+def connection_settings(environ):
+    """Ключи CONN_MAX_AGE / CONN_HEALTH_CHECKS / OPTIONS для DATABASES """
+
+    mode = environ.get('DB_POOL_MODE', '')
+    if mode not in POOL_MODES:
+        raise ImproperlyConfigured(f'DB_POOL_MODE: ожидалось одно из {POOL_MODES}, получено {mode!r}')
+
+    if mode == 'psycopg':
+        # Пул сам проверяет и пересоздаёт соединения; CONN_MAX_AGE с ним несовместим
+        return {
+            'CONN_MAX_AGE': 0,
+            'CONN_HEALTH_CHECKS': False,
+            'OPTIONS': {'pool': {
+                'min_size': int(environ.get('DB_POOL_MIN_SIZE', 2)),
+                'max_size': int(environ.get('DB_POOL_MAX_SIZE', 10)),
+                'timeout': float(environ.get('DB_POOL_TIMEOUT', 10)),
+            }},
+        }
+
+    settings = {
+        'CONN_MAX_AGE': int(environ.get('DB_CONN_MAX_AGE', 60)),
+        'CONN_HEALTH_CHECKS': True,
+        'OPTIONS': {},
+    }
+    if mode == 'pgbouncer' and importlib.util.find_spec('psycopg') is not None:
+        # Подготовленные выражения живут в серверной сессии, а pgbouncer
+        # отдаёт каждую транзакцию любому серверному соединению
+        settings['OPTIONS']['prepare_threshold'] = None
+    return settings
@@ -0,0 +1,20 @@
+"""Профиль настроек по DJANGO_ENV: production (по умолчанию) или dev
+
+Без DJANGO_ENV загружается production, чтобы забытая переменная не включала
+DEBUG на сервере; локально DJANGO_ENV=dev задаётся явно. Профиль можно указать
+и напрямую: DJANGO_SETTINGS_MODULE=diplom.settings.dev (pytest.ini указывает
+diplom.settings.test), тогда пакет профиль по DJANGO_ENV не загружает.
+"""
+import os
+
+from django.core.exceptions import ImproperlyConfigured
+
+DJANGO_ENV = os.environ.get('DJANGO_ENV', 'production')
+
+if os.environ.get('DJANGO_SETTINGS_MODULE') == __name__:
+    if DJANGO_ENV == 'production':
+        from .production import *  # noqa: F401,F403
+    elif DJANGO_ENV == 'dev':
+        from .dev import *  # noqa: F401,F403
+    else:
+        raise ImproperlyConfigured(f'DJANGO_ENV: ожидалось dev или production, получено {DJANGO_ENV!r}')
@@ -0,0 +1,195 @@
+"""
+Django settings for diplom project: общие для всех профилей.
+
+Generated by 'django-admin startproject' using Django 3.2.4.
+Профили — diplom/settings/dev.py и production.py, выбираются DJANGO_ENV.
+
+For more information on this file, see
+https://docs.djangoproject.com/en/3.2/topics/settings/
+
+For the full list of settings and their values, see
+https://docs.djangoproject.com/en/3.2/ref/settings/
+"""
+
+from pathlib import Path
+import os
+from ..database import connection_settings
+
+# Build paths inside the project like this: BASE_DIR / 'subdir'.
+BASE_DIR = Path(__file__).resolve().parent.parent.parent
+
+# SECURITY WARNING: keep the secret key used in production secret!
+SECRET_KEY = os.environ.get('DJANGO_SECRET_KEY')
+
+# SECURITY WARNING: don't run with debug turned on in production!
+DEBUG = False
+
+ALLOWED_HOSTS = [host for host in os.environ.get('DJANGO_ALLOWED_HOSTS', '').split(',') if host]
+
+# Application definition
+
+INSTALLED_APPS = [
+    'django.contrib.admin',
+    'django.contrib.auth',
+    'django.contrib.contenttypes',
+    'django.contrib.sessions',
+    'django.contrib.messages',
+    'django.contrib.staticfiles',
+    'django.contrib.postgres',
+
+    'rest_framework.authtoken',
+    'rest_framework',
+    'django_filters',
+    'online_shop',
+]
+
+REST_FRAMEWORK = {
+    'DEFAULT_FILTER_BACKENDS': ['django_filters.rest_framework.DjangoFilterBackend', ],
+    'DEFAULT_AUTHENTICATION_CLASSES': ['online_shop.authentication.CachedTokenAuthentication', ],
+    'DEFAULT_PAGINATION_CLASS': 'online_shop.pagination.CreatedAtCursorPagination',
+    'PAGE_SIZE': 50,
+    # orjson, если установлен; иначе стандартный json DRF
+    'DEFAULT_RENDERER_CLASSES': [
+        'online_shop.renderers.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
+    'DEFAULT_PARSER_CLASSES': [
+        'online_shop.parsers.FastJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ],
+}
+
+# Время жизни кеша токен -> пользователь, секунд
+AUTH_TOKEN_CACHE_TIMEOUT = 60
+
+# Запас при сдвиге водяного знака refresh_statistics, секунд
+STATISTICS_WATERMARK_LAG = 60
+
+# Верхняя граница для ?page_size= в API
+API_MAX_PAGE_SIZE = 100
+
+# Сколько объектов можно передать в один запрос /bulk/
+API_MAX_BULK_SIZE = 1000
+
+MIDDLEWARE = [
+    'online_shop.middleware.QueryInstrumentationMiddleware',
+    'online_shop.routers.ReplicaRoutingMiddleware',
+    'django.middleware.security.SecurityMiddleware',
+    'django.contrib.sessions.middleware.SessionMiddleware',
+    'django.middleware.common.CommonMiddleware',
+    'django.middleware.csrf.CsrfViewMiddleware',
+    'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'django.contrib.messages.middleware.MessageMiddleware',
+    'django.middleware.clickjacking.XFrameOptionsMiddleware',
+]
+
+# Размер пачки строк, читаемых курсором при потоковой выгрузке
+EXPORT_CHUNK_SIZE = 2000
+
+# Доля запросов, для которых собирается статистика БД (0 — выключено)
+DB_INSTRUMENTATION_SAMPLE_RATE = float(os.environ.get('DB_INSTRUMENTATION_SAMPLE_RATE', 1.0))
+# Порог, начиная с которого в лог пишется полный SQL запроса, мс
+DB_SLOW_REQUEST_MS = 500
+
+ROOT_URLCONF = 'diplom.urls'
+
+TEMPLATES = [
+    {
+        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        'DIRS': [],
+        'APP_DIRS': True,
+        'OPTIONS': {
+            'context_processors': [
+                'django.template.context_processors.debug',
+                'django.template.context_processors.request',
+                'django.contrib.auth.context_processors.auth',
+                'django.contrib.messages.context_processors.messages',
+            ],
+        },
+    },
+]
+
+WSGI_APPLICATION = 'diplom.wsgi.application'
+
+# Database
+# https://docs.djangoproject.com/en/3.2/ref/settings/#databases
+
+DATABASES = {
+    'default': {
+        'ENGINE': 'django.db.backends.postgresql',
+        'NAME': os.environ.get('DB_NAME', 'django_diplom'),
+        'USER': os.environ.get('DB_USER', ''),
+        'PASSWORD': os.environ.get('DB_PASSWORD', ''),
+        'HOST': os.environ.get('DB_HOST', '127.0.0.1'),
+        'PORT': os.environ.get('DB_PORT', '5432'),
+        # CONN_MAX_AGE, CONN_HEALTH_CHECKS и пул — см. diplom/database.py
+        **connection_settings(os.environ),
+    }
+}
+
+# Реплика для чтения каталога, отзывов и подборок (DB_REPLICA_HOST).
+# Без неё всё читается из default
+if os.environ.get('DB_REPLICA_HOST'):
+    DATABASES['replica'] = {
+        **DATABASES['default'],
+        'HOST': os.environ['DB_REPLICA_HOST'],
+        'PORT': os.environ.get('DB_REPLICA_PORT', DATABASES['default']['PORT']),
+        'TEST': {'MIRROR': 'default'},
+    }
+DATABASE_REPLICA_ALIAS = 'replica' if 'replica' in DATABASES else None
+DATABASE_ROUTERS = ['online_shop.routers.ReplicaRouter']
+
+# Сколько секунд после записи клиент читает с основной БД
+REPLICA_PIN_SECONDS = 5
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    }
+}
+
+# Время жизни закешированных ответов каталога, секунды
+CATALOGUE_CACHE_TIMEOUT = 300
+
+# Password validation
+# https://docs.djangoproject.com/en/3.2/ref/settings/#auth-password-validators
+
+AUTH_PASSWORD_VALIDATORS = [
+    {
+        'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator',
+    },
+    {
+        'NAME': 'django.contrib.auth.password_validation.MinimumLengthValidator',
+    },
+    {
+        'NAME': 'django.contrib.auth.password_validation.CommonPasswordValidator',
+    },
+    {
+        'NAME': 'django.contrib.auth.password_validation.NumericPasswordValidator',
+    },
+]
+
+# Internationalization
+# https://docs.djangoproject.com/en/3.2/topics/i18n/
+
+LANGUAGE_CODE = 'en-us'
+
+TIME_ZONE = 'UTC'
+
+USE_I18N = True
+
+USE_L10N = True
+
+USE_TZ = True
+
+# Static files (CSS, JavaScript, Images)
+# https://docs.djangoproject.com/en/3.2/howto/static-files/
+
+STATIC_URL = '/static/'
+
+# Default primary key field type
+# https://docs.djangoproject.com/en/3.2/ref/settings/#default-auto-field
+
+DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
+
@@ -0,0 +1,19 @@
+"""Профиль для локальной разработки: DEBUG, Browsable API, кеш в памяти процесса """
+import os
+
+try:
+    # Старый локальный diplom/config.py по-прежнему подхватывается,
+    # переменные окружения имеют приоритет
+    from .. import config
+except ImportError:
+    config = None
+else:
+    os.environ.setdefault('DB_USER', config.user)
+    os.environ.setdefault('DB_PASSWORD', config.password_db)
+    os.environ.setdefault('DJANGO_SECRET_KEY', config.secret_key)
+
+from .base import *  # noqa: E402,F401,F403
+
+DEBUG = True
+
+SECRET_KEY = SECRET_KEY or 'django-insecure-dev-only'
@@ -0,0 +1,59 @@
+"""Профиль для продакшена, целиком из переменных окружения
+
+Обязательные: DJANGO_SECRET_KEY, DJANGO_ALLOWED_HOSTS, REDIS_URL и
+DB_NAME/DB_USER/DB_PASSWORD/DB_HOST. Пул соединений — DB_POOL_MODE
+(см. diplom/database.py), реплика — DB_REPLICA_HOST.
+"""
+import os
+
+from django.core.exceptions import ImproperlyConfigured
+
+from .base import *  # noqa: F401,F403
+
+
+def _require(name):
+    value = os.environ.get(name)
+    if not value:
+        raise ImproperlyConfigured(f'Не задана переменная окружения {name}')
+    return value
+
+
+# Без DEBUG Django не копит SQL в connection.queries на каждый запрос
+DEBUG = False
+
+SECRET_KEY = _require('DJANGO_SECRET_KEY')
+ALLOWED_HOSTS = _require('DJANGO_ALLOWED_HOSTS').split(',')
+
+REST_FRAMEWORK = {
+    **REST_FRAMEWORK,
+    'DEFAULT_RENDERER_CLASSES': ['online_shop.renderers.FastJSONRenderer'],
+}
+
+TEMPLATES = [{
+    **TEMPLATES[0],
+    'APP_DIRS': False,
+    'OPTIONS': {
+        **TEMPLATES[0]['OPTIONS'],
+        'loaders': [('django.template.loaders.cached.Loader', [
+            'django.template.loaders.filesystem.Loader',
+            'django.template.loaders.app_directories.Loader',
+        ])],
+    },
+}]
+
+# Кеш каталога и токенов инвалидируется версиями в кеше: он должен быть
+# общим для всех воркеров, LocMemCache здесь не подходит
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': _require('REDIS_URL'),
+    }
+}
+
+DB_INSTRUMENTATION_SAMPLE_RATE = float(os.environ.get('DB_INSTRUMENTATION_SAMPLE_RATE', 0.01))
+
+STATIC_ROOT = os.environ.get('DJANGO_STATIC_ROOT', str(BASE_DIR / 'static'))
+
+SECURE_PROXY_SSL_HEADER = ('HTTP_X_FORWARDED_PROTO', 'https')
+SESSION_COOKIE_SECURE = True
+CSRF_COOKIE_SECURE = True
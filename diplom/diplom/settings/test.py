@@ -0,0 +1,8 @@
+"""Профиль для тестов (pytest.ini): dev и зеркало реплики"""
+
+from .dev import *  # noqa: F401,F403
+
+# Без DB_REPLICA_HOST 'replica' — второе соединение к той же БД, зеркало
+# default (test_replica.py проверяет по нему маршрутизацию).
+# DATABASE_REPLICA_ALIAS при этом пуст, и маршрутизатор его не использует
+DATABASES.setdefault('replica', {**DATABASES['default'], 'TEST': {'MIRROR': 'default'}})  # noqa: F405
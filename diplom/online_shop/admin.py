@@ -14,8 +14,14 @@ class ProductOrderInLine(admin.TabularInline):
     model = ProductOrder
 
 
+class OrderStatusTransitionInLine(admin.TabularInline):
+    model = OrderStatusTransition
+    readonly_fields = ('from_status', 'to_status', 'user', 'created_at')
+    extra = 0
+
+
 class OrdersAdmin(admin.ModelAdmin):
-    inlines = [ProductOrderInLine]
+    inlines = [ProductOrderInLine, OrderStatusTransitionInLine]
 
 
 class ProductCollectionsProductsInLine(admin.TabularInline):
@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class OnlineShopConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'online_shop'
+
+    def ready(self):
+        from . import signals  # noqa: F401
@@ -0,0 +1,153 @@
+import base64
+import binascii
+import json
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.http import JsonResponse
+from rest_framework.settings import api_settings
+
+from .caching import cached_catalogue_response
+from .filters import ProductFilter
+from .models import Products, ProductCollections
+from .pagination import keyset_condition, keyset_position
+from .serializers import ProductSerializer, ProductCollectionsSerializer
+from .views import ProductCollectionsViewSet, ProductsViewSet
+
+JSON_PARAMS = {'ensure_ascii': False}
+
+
+def products_queryset():
+    return Products.objects.defer('search_vector')
+
+
+def collections_queryset():
+    return ProductCollectionsViewSet().get_queryset()
+
+
+def encode_cursor(instance, ordering):
+    raw = json.dumps(keyset_position(instance, ordering))
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def decode_cursor(cursor, ordering):
+    """Значения полей ordering из курсора; None, если курсор битый """
+
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor.encode()).decode())
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        return None
+    if not isinstance(values, list) or len(values) != len(ordering):
+        return None
+    return values
+
+
+def product_ordering(request):
+    """Сортировка как у ProductsViewSet: ?ordering=, без него релевантность для ?search= """
+
+    fields = [field.strip() for field in request.GET.get('ordering', '').split(',')]
+    ordering = tuple(field for field in fields if field.lstrip('-') in ProductsViewSet.ordering_fields)
+    if ordering:
+        return ordering
+    if request.GET.get('search'):
+        return ('-search_rank',)
+    return ('created_at',)
+
+
+def page_size(request):
+    try:
+        size = int(request.GET.get('page_size', api_settings.PAGE_SIZE))
+    except ValueError:
+        size = api_settings.PAGE_SIZE
+    return max(1, min(size, getattr(settings, 'API_MAX_PAGE_SIZE', 100)))
+
+
+async def paginate(request, queryset, ordering=('created_at',)):
+    """Keyset-страница по (*ordering, id): один запрос на page_size + 1 строк """
+
+    ordering = tuple(ordering) + ('id',)
+    queryset = queryset.order_by(*ordering)
+    cursor = request.GET.get('cursor')
+    if cursor:
+        values = decode_cursor(cursor, ordering)
+        if values is None:
+            return None, None
+        try:
+            queryset = queryset.filter(keyset_condition(ordering, values))
+        except (TypeError, ValueError, ValidationError):
+            return None, None
+    size = page_size(request)
+    page = [obj async for obj in queryset[:size + 1]]
+
+    next_url = None
+    if len(page) > size:
+        page = page[:size]
+        params = request.GET.copy()
+        params['cursor'] = encode_cursor(page[-1], ordering)
+        next_url = request.build_absolute_uri(f'{request.path}?{params.urlencode()}')
+    return page, next_url
+
+
+def invalid_cursor():
+    return JsonResponse({'detail': 'Неверный курсор'}, status=400, json_dumps_params=JSON_PARAMS)
+
+
+def not_found():
+    return JsonResponse({'detail': 'Не найдено'}, status=404, json_dumps_params=JSON_PARAMS)
+
+
+async def product_list(request):
+    """Список товаров (async ORM) через кеш каталога """
+
+    return await cached_catalogue_response(request, 'async-list', {}, build_product_list)
+
+
+async def product_detail(request, pk):
+    """Товар по id (async ORM) через кеш каталога """
+
+    return await cached_catalogue_response(request, 'async-retrieve', {'pk': pk}, build_product_detail)
+
+
+async def build_product_list(request):
+    """Список товаров, фильтры как у ProductsViewSet """
+
+    filterset = ProductFilter(request.GET, queryset=products_queryset(), request=request)
+    if not filterset.is_valid():
+        return JsonResponse(filterset.errors, status=400, json_dumps_params=JSON_PARAMS)
+    page, next_url = await paginate(request, filterset.qs, product_ordering(request))
+    if page is None:
+        return invalid_cursor()
+    data = ProductSerializer(page, many=True).data
+    return JsonResponse({'next': next_url, 'previous': None, 'results': data},
+                        json_dumps_params=JSON_PARAMS)
+
+
+async def build_product_detail(request, pk):
+    """Товар по id """
+
+    try:
+        product = await products_queryset().aget(pk=pk)
+    except Products.DoesNotExist:
+        return not_found()
+    return JsonResponse(ProductSerializer(product).data, json_dumps_params=JSON_PARAMS)
+
+
+async def collection_list(request):
+    """Список подборок: пользователь и товары тем же prefetch, что и в ViewSet """
+
+    page, next_url = await paginate(request, collections_queryset())
+    if page is None:
+        return invalid_cursor()
+    data = ProductCollectionsSerializer(page, many=True).data
+    return JsonResponse({'next': next_url, 'previous': None, 'results': data},
+                        json_dumps_params=JSON_PARAMS)
+
+
+async def collection_detail(request, pk):
+    """Подборка по id (async ORM) """
+
+    try:
+        collection = await collections_queryset().aget(pk=pk)
+    except ProductCollections.DoesNotExist:
+        return not_found()
+    return JsonResponse(ProductCollectionsSerializer(collection).data, json_dumps_params=JSON_PARAMS)
@@ -0,0 +1,45 @@
+import hashlib
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from rest_framework import exceptions
+from rest_framework.authentication import TokenAuthentication
+
+
+def token_cache_key(key):
+    # В ключе кеша хеш, а не сам токен
+    return f'auth:token:{hashlib.sha256(key.encode()).hexdigest()}'
+
+
+# Поля пользователя, которые хранятся в кеше: без пароля и персональных данных
+USER_SNAPSHOT_FIELDS = ('id', 'is_active', 'is_staff', 'is_superuser')
+
+
+def invalidate_tokens(*keys):
+    """Сбрасывает закешированных пользователей для токенов """
+
+    cache.delete_many([token_cache_key(key) for key in keys])
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """TokenAuthentication с кешем токен -> пользователь на AUTH_TOKEN_CACHE_TIMEOUT секунд
+
+    В кеше лежит только снимок USER_SNAPSHOT_FIELDS; из него собирается
+    несохранённый User с тем же id. Сброс по сигналам: удаление токена,
+    сохранение или удаление пользователя.
+    """
+
+    def authenticate_credentials(self, key):
+        cache_key = token_cache_key(key)
+        snapshot = cache.get(cache_key)
+        if snapshot is None:
+            user, token = super().authenticate_credentials(key)
+            snapshot = {field: getattr(user, field) for field in USER_SNAPSHOT_FIELDS}
+            cache.set(cache_key, snapshot, getattr(settings, 'AUTH_TOKEN_CACHE_TIMEOUT', 60))
+            return user, token
+
+        if not snapshot['is_active']:
+            raise exceptions.AuthenticationFailed('User inactive or deleted.')
+        user = get_user_model()(**snapshot)
+        return user, self.get_model()(key=key, user=user)
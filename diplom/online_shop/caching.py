@@ -0,0 +1,122 @@
+import hashlib
+import time
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.utils.http import http_date
+from rest_framework import status
+from rest_framework.response import Response
+
+from .conditional import cache_validators, not_modified_response
+
+CATALOGUE_VERSION_KEY = 'catalogue:version'
+CATALOGUE_HITS_KEY = 'catalogue:hits'
+CATALOGUE_MISSES_KEY = 'catalogue:misses'
+CATALOGUE_CHANGED_KEY = 'catalogue:changed'
+
+
+def _incr(key, delta=1):
+    try:
+        return cache.incr(key, delta)
+    except ValueError:
+        cache.add(key, 0, None)
+        return cache.incr(key, delta)
+
+
+def get_catalogue_version():
+    """Текущая версия каталога """
+
+    version = cache.get(CATALOGUE_VERSION_KEY)
+    if version is None:
+        # Начальное значение от времени, чтобы после вытеснения ключа
+        # не переиспользовать записи, сохранённые под старыми версиями
+        cache.add(CATALOGUE_VERSION_KEY, time.time_ns(), None)
+        version = cache.get(CATALOGUE_VERSION_KEY)
+    return version
+
+
+def bump_catalogue_version():
+    """Инвалидирует все закешированные ответы каталога
+
+    На REPLICA_PIN_SECONDS кеш каталога заполняется с основной БД, иначе
+    отстающая реплика попала бы в кеш под новой версией (routers).
+    """
+
+    get_catalogue_version()
+    cache.set(CATALOGUE_CHANGED_KEY, 1, getattr(settings, 'REPLICA_PIN_SECONDS', 5))
+    return _incr(CATALOGUE_VERSION_KEY)
+
+
+def get_catalogue_cache_stats():
+    """Счётчики попаданий и промахов кеша каталога """
+
+    stats = cache.get_many([CATALOGUE_HITS_KEY, CATALOGUE_MISSES_KEY])
+    return {
+        'hits': stats.get(CATALOGUE_HITS_KEY, 0),
+        'misses': stats.get(CATALOGUE_MISSES_KEY, 0),
+    }
+
+
+def catalogue_cache_key(request, action, kwargs):
+    query_params = getattr(request, 'query_params', request.GET)
+    params = sorted(
+        (key, sorted(values)) for key, values in query_params.lists()
+    )
+    raw = repr((request.get_host(), action, sorted(kwargs.items()), params))
+    digest = hashlib.md5(raw.encode()).hexdigest()
+    return f'catalogue:{get_catalogue_version()}:{digest}'
+
+
+async def cached_catalogue_response(request, action, kwargs, handler):
+    """Тот же кеш каталога для async-представлений: хранится готовое тело ответа """
+
+    key = await sync_to_async(catalogue_cache_key)(request, action, kwargs)
+    content = await cache.aget(key)
+    if content is not None:
+        await sync_to_async(_incr)(CATALOGUE_HITS_KEY)
+        response = HttpResponse(content, content_type='application/json')
+        response['X-Cache'] = 'HIT'
+        return response
+
+    await sync_to_async(_incr)(CATALOGUE_MISSES_KEY)
+    response = await handler(request, **kwargs)
+    if response.status_code == status.HTTP_200_OK:
+        await cache.aset(key, response.content, getattr(settings, 'CATALOGUE_CACHE_TIMEOUT', 300))
+    response['X-Cache'] = 'MISS'
+    return response
+
+
+class CatalogueCacheMixin:
+    """Read-through кеш ответов list/retrieve, версионируемый по каталогу """
+
+    def list(self, request, *args, **kwargs):
+        return self._cached_response(super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self._cached_response(super().retrieve, request, *args, **kwargs)
+
+    def _cached_response(self, handler, request, *args, **kwargs):
+        key = catalogue_cache_key(request, self.action, kwargs)
+        entry = cache.get(key)
+        if entry is not None:
+            _incr(CATALOGUE_HITS_KEY)
+            data, etag, last_modified = entry
+            response = not_modified_response(request, etag, last_modified)
+            if response is None:
+                response = Response(data)
+                if etag:
+                    response['ETag'] = etag
+                if last_modified:
+                    response['Last-Modified'] = http_date(last_modified)
+            response['X-Cache'] = 'HIT'
+            return response
+
+        _incr(CATALOGUE_MISSES_KEY)
+        response = handler(request, *args, **kwargs)
+        if response.status_code == status.HTTP_200_OK:
+            entry = (response.data, *cache_validators(response))
+            cache.set(key, entry, getattr(settings, 'CATALOGUE_CACHE_TIMEOUT', 300))
+        response['X-Cache'] = 'MISS'
+        return response
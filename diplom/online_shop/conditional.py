@@ -0,0 +1,100 @@
+import hashlib
+
+from django.db.models import F, Max
+from django.db.models.functions import Coalesce, Greatest
+from django.utils.cache import get_conditional_response, quote_etag
+from django.utils.http import http_date, parse_http_date_safe
+from rest_framework import status
+from rest_framework.response import Response
+
+
+def not_modified_response(request, etag, last_modified):
+    """304, если клиент уже имеет актуальную версию, иначе None """
+
+    return get_conditional_response(request, etag=etag, last_modified=last_modified)
+
+
+def is_conditional(request):
+    return 'HTTP_IF_NONE_MATCH' in request.META or 'HTTP_IF_MODIFIED_SINCE' in request.META
+
+
+def cache_validators(response):
+    """ETag и Last-Modified ответа в виде, пригодном для повторной проверки """
+
+    last_modified = response.get('Last-Modified')
+    return response.get('ETag'), last_modified and parse_http_date_safe(last_modified)
+
+
+class ConditionalGetMixin:
+    """ETag/Last-Modified для list/retrieve по updated_at
+
+    Версия объекта берётся из updated_at (и updated_at связанных объектов
+    из conditional_related). На условный запрос 304 отдаётся по узкому
+    запросу без сериализации тела ответа; полный ответ list получает
+    валидаторы по той же странице, что сериализуется, без второго запроса.
+    """
+
+    conditional_related = ()
+
+    def _annotate_version(self, queryset):
+        version = F('updated_at')
+        for field in self.conditional_related:
+            version = Greatest(version, Coalesce(Max(field), F('updated_at')))
+        return queryset.annotate(etag_version=version)
+
+    def _versioned(self, queryset):
+        return self._annotate_version(queryset.prefetch_related(None).select_related(None))
+
+    def list(self, request, *args, **kwargs):
+        if is_conditional(request):
+            queryset = self._versioned(self.filter_queryset(self.get_queryset()))
+            fields = {'pk', 'updated_at'}
+            if self.paginator is not None and hasattr(self.paginator, 'get_ordering'):
+                ordering = self.paginator.get_ordering(request, queryset, self)
+                concrete = {field.name for field in queryset.model._meta.concrete_fields}
+                fields.update(field.lstrip('-') for field in ordering if field.lstrip('-') in concrete)
+            queryset = queryset.only(*fields)
+            page = self.paginate_queryset(queryset)
+            if page is None:
+                page = queryset
+            etag, last_modified = self._validators(request, [(obj.pk, obj.etag_version) for obj in page])
+            not_modified = not_modified_response(request, etag, last_modified)
+            if not_modified is not None:
+                return not_modified
+
+        queryset = self._annotate_version(self.filter_queryset(self.get_queryset()))
+        page = self.paginate_queryset(queryset)
+        objects = queryset if page is None else page
+        rows = [(obj.pk, obj.etag_version) for obj in objects]
+        serializer = self.get_serializer(objects, many=True)
+        if page is None:
+            response = Response(serializer.data)
+        else:
+            response = self.get_paginated_response(serializer.data)
+        return self._set_validators(response, *self._validators(request, rows))
+
+    def retrieve(self, request, *args, **kwargs):
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        queryset = self._versioned(self.filter_queryset(self.get_queryset()))
+        rows = list(queryset.filter(**{self.lookup_field: kwargs[lookup_url_kwarg]})
+                    .values_list('pk', 'etag_version'))
+        if not rows:
+            return super().retrieve(request, *args, **kwargs)
+
+        etag, last_modified = self._validators(request, rows)
+        not_modified = not_modified_response(request, etag, last_modified)
+        if not_modified is not None:
+            return not_modified
+        return self._set_validators(super().retrieve(request, *args, **kwargs), etag, last_modified)
+
+    def _validators(self, request, rows):
+        digest = hashlib.md5(repr((request.get_full_path(), rows)).encode()).hexdigest()
+        versions = [version for _, version in rows if version is not None]
+        return quote_etag(digest), int(max(versions).timestamp()) if versions else None
+
+    def _set_validators(self, response, etag, last_modified):
+        if response.status_code == status.HTTP_200_OK:
+            response['ETag'] = etag
+            if last_modified is not None:
+                response['Last-Modified'] = http_date(last_modified)
+        return response
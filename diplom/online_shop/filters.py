@@ -1,6 +1,8 @@
 from django_filters import rest_framework as filters
+from rest_framework.filters import OrderingFilter
 
-from .models import Products, Orders, ProductReviews
+from .models import Products, Orders, ProductReviews, OrderStatusChoices
+from .search import search_products
 
 
 class ProductFilter(filters.FilterSet):
@@ -9,10 +11,25 @@ class ProductFilter(filters.FilterSet):
     name = filters.CharFilter(field_name='name')
     description = filters.CharFilter(field_name='description')
     price = filters.RangeFilter(field_name='price')
+    rating_avg = filters.RangeFilter(field_name='rating_avg')
+    rating_count = filters.RangeFilter(field_name='rating_count')
+    search = filters.CharFilter(method='filter_search')
 
     class Meta:
         model = Products
-        fields = ('name', 'description', 'price',)
+        fields = ('name', 'description', 'price', 'rating_avg', 'rating_count', 'search',)
+
+    def filter_search(self, queryset, name, value):
+        return search_products(queryset, value)
+
+
+class SearchOrderingFilter(OrderingFilter):
+    """ Сортировка по релевантности, если задан ?search= и не задан ?ordering= """
+
+    def get_default_ordering(self, view):
+        if view.request.query_params.get('search'):
+            return ('-search_rank',)
+        return super().get_default_ordering(view)
 
 
 class ProductReviewsFilter(filters.FilterSet):
@@ -20,7 +37,7 @@ class ProductReviewsFilter(filters.FilterSet):
 
     user_id = 'user__id'
     product_id = filters.NumberFilter(field_name='product_id')
-    created_at = filters.DateFromToRangeFilter(field_name='release_date')
+    created_at = filters.DateFromToRangeFilter(field_name='created_at')
 
     class Meta:
         model = ProductReviews
@@ -30,11 +47,18 @@ class ProductReviewsFilter(filters.FilterSet):
 class OrdersFilter(filters.FilterSet):
     """ Фильтр заказов """
 
-    product_id = filters.NumberFilter(field_name='product_id')
+    product_id = filters.NumberFilter(field_name='positions__product_id')
     price_cart = filters.NumberFilter(field_name='price_cart')
-    created_at = filters.DateFromToRangeFilter(field_name='release_date')
-    updated_at = filters.DateFromToRangeFilter(field_name='updated_date')
+    created_at = filters.DateFromToRangeFilter(field_name='created_at')
+    updated_at = filters.DateFromToRangeFilter(field_name='updated_at')
+    is_open = filters.BooleanFilter(method='filter_is_open')
 
     class Meta:
         model = Orders
-        fields = ('status', 'price_cart', 'created_at', 'updated_at',)
+        fields = ('status', 'price_cart', 'created_at', 'updated_at', 'is_open',)
+
+    def filter_is_open(self, queryset, name, value):
+        # Условие совпадает с частичным индексом orders_open_created_idx
+        if value:
+            return queryset.exclude(status=OrderStatusChoices.DONE)
+        return queryset.filter(status=OrderStatusChoices.DONE)
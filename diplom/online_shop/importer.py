@@ -0,0 +1,156 @@
+import csv
+import io
+import json
+from itertools import islice
+
+from django.db import connection, transaction
+from django.utils import timezone
+from rest_framework.exceptions import ValidationError
+
+from .caching import bump_catalogue_version
+from .models import Products
+from .serializers import ProductSerializer
+
+IMPORT_FIELDS = ('supplier_sku', 'name', 'description', 'price')
+SUPPLIER_SKU_MAX_LENGTH = Products._meta.get_field('supplier_sku').max_length
+
+
+def iter_rows(file, file_format):
+    """Построчно читает CSV/NDJSON, возвращая пары (номер строки, словарь) """
+
+    if file_format == 'csv':
+        reader = csv.DictReader(file)
+        for row in reader:
+            yield reader.line_num, row
+        return
+
+    for line_number, line in enumerate(file, start=1):
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError as exc:
+            row = exc
+        yield line_number, row
+
+
+def batches(rows, size):
+    rows = iter(rows)
+    while True:
+        batch = list(islice(rows, size))
+        if not batch:
+            return
+        yield batch
+
+
+def validate_batch(batch):
+    """Проверяет пачку строк правилами ProductSerializer
+
+    Возвращает валидные строки и ошибки в виде (номер строки, ошибки).
+    Экземпляр сериализатора один на пачку, к БД проверки не обращаются.
+    """
+
+    serializer = ProductSerializer()
+    valid, errors = [], []
+    for line_number, row in batch:
+        if not isinstance(row, dict):
+            errors.append((line_number, {'non_field_errors': [str(row) or 'Ожидался объект']}))
+            continue
+        supplier_sku = str(row.get('supplier_sku') or '').strip()
+        try:
+            # Пустые ячейки CSV считаются отсутствующими значениями
+            data = serializer.run_validation({field: row[field] for field in IMPORT_FIELDS[1:]
+                                              if row.get(field) not in (None, '')})
+        except ValidationError as exc:
+            errors.append((line_number, exc.detail))
+            continue
+        if not supplier_sku or len(supplier_sku) > SUPPLIER_SKU_MAX_LENGTH:
+            errors.append((line_number, {
+                'supplier_sku': [f'Обязательное поле, не длиннее {SUPPLIER_SKU_MAX_LENGTH} символов'],
+            }))
+            continue
+        valid.append((line_number, supplier_sku, data['name'], data.get('description', ''), data['price']))
+    return valid, errors
+
+
+def _copy_to_staging(cursor, rows):
+    buffer = io.StringIO()
+    csv.writer(buffer).writerows(rows)
+    buffer.seek(0)
+    sql = 'COPY import_products_staging (line, supplier_sku, name, description, price) FROM STDIN WITH (FORMAT csv)'
+    if hasattr(cursor, 'copy_expert'):
+        cursor.copy_expert(sql, buffer)
+    else:
+        with cursor.copy(sql) as copy:
+            copy.write(buffer.getvalue())
+
+
+def _load_postgresql(rows):
+    with connection.cursor() as cursor:
+        # Таблица живёт до конца транзакции, а не сессии: после коммита в
+        # соединении (в том числе серверном соединении pgbouncer) ничего не остаётся
+        cursor.execute(
+            'CREATE TEMPORARY TABLE IF NOT EXISTS import_products_staging ('
+            ' line integer, supplier_sku varchar(64), name varchar(128), description text, price integer'
+            ') ON COMMIT DROP'
+        )
+        cursor.execute('TRUNCATE import_products_staging')
+        _copy_to_staging(cursor, rows)
+        # Вся пачка получает одно время: одинаковые created_at различает
+        # id в курсоре пагинации
+        now = timezone.now()
+        cursor.execute(
+            """
+            INSERT INTO online_shop_products
+                (supplier_sku, name, description, price, rating_sum, rating_count, rating_avg,
+                 created_at, updated_at)
+            SELECT DISTINCT ON (supplier_sku)
+                supplier_sku, name, description, price, 0, 0, 0, %s, %s
+            FROM import_products_staging
+            ORDER BY supplier_sku, line DESC
+            ON CONFLICT (supplier_sku) DO UPDATE SET
+                name = EXCLUDED.name,
+                description = EXCLUDED.description,
+                price = EXCLUDED.price,
+                updated_at = EXCLUDED.updated_at
+            RETURNING (xmax = 0)
+            """,
+            [now, now],
+        )
+        inserted = [row[0] for row in cursor.fetchall()]
+    return inserted.count(True), inserted.count(False)
+
+
+def _load_generic(rows):
+    latest = {}
+    for line_number, supplier_sku, name, description, price in rows:
+        latest[supplier_sku] = Products(supplier_sku=supplier_sku, name=name,
+                                        description=description, price=price)
+    existing = set(
+        Products.objects.filter(supplier_sku__in=latest).values_list('supplier_sku', flat=True)
+    )
+    Products.objects.bulk_create(
+        latest.values(),
+        update_conflicts=True,
+        unique_fields=['supplier_sku'],
+        update_fields=['name', 'description', 'price', 'updated_at'],
+    )
+    return len(latest) - len(existing), len(existing)
+
+
+@transaction.atomic
+def load_batch(rows):
+    """Upsert пачки по supplier_sku; возвращает (добавлено, обновлено)
+
+    На PostgreSQL — COPY во временную таблицу и один INSERT ... ON CONFLICT,
+    на остальных СУБД — bulk_create(update_conflicts=True).
+    """
+
+    if not rows:
+        return 0, 0
+    if connection.vendor == 'postgresql':
+        result = _load_postgresql(rows)
+    else:
+        result = _load_generic(rows)
+    bump_catalogue_version()
+    return result
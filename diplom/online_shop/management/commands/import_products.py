@@ -0,0 +1,65 @@
+import json
+import sys
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from online_shop.importer import batches, iter_rows, load_batch, validate_batch
+
+
+class Command(BaseCommand):
+    help = 'Импорт каталога товаров из CSV/NDJSON с upsert по supplier_sku'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='Файл CSV или NDJSON; "-" — stdin')
+        parser.add_argument('--format', choices=['csv', 'ndjson'],
+                            help='Формат файла; по умолчанию определяется по расширению')
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument('--dry-run', action='store_true', help='Только проверить строки, ничего не записывая')
+        parser.add_argument('--errors', help='Файл для ошибок по строкам (NDJSON); по умолчанию stderr')
+
+    def handle(self, *args, **options):
+        path = options['path']
+        file_format = options['format'] or ('csv' if path.endswith('.csv') else 'ndjson')
+        if options['batch_size'] < 1:
+            raise CommandError('--batch-size должен быть положительным')
+
+        try:
+            file = sys.stdin if path == '-' else open(path, encoding='utf-8', newline='')
+        except OSError as exc:
+            raise CommandError(exc)
+        errors_file = open(options['errors'], 'w', encoding='utf-8') if options['errors'] else None
+
+        total = invalid = inserted = updated = 0
+        start = time.perf_counter()
+        try:
+            for batch in batches(iter_rows(file, file_format), options['batch_size']):
+                valid, errors = validate_batch(batch)
+                total += len(batch)
+                invalid += len(errors)
+                for line_number, detail in errors:
+                    record = json.dumps({'line': line_number, 'errors': detail}, ensure_ascii=False)
+                    if errors_file:
+                        errors_file.write(record + '\n')
+                    else:
+                        self.stderr.write(record)
+
+                if not options['dry_run']:
+                    batch_inserted, batch_updated = load_batch(valid)
+                    inserted += batch_inserted
+                    updated += batch_updated
+                if options['verbosity'] > 1:
+                    self.stdout.write(f'Обработано строк: {total}')
+        finally:
+            if file is not sys.stdin:
+                file.close()
+            if errors_file:
+                errors_file.close()
+
+        elapsed = time.perf_counter() - start
+        rate = total / elapsed if elapsed else total
+        summary = (f'Строк: {total}, ошибок: {invalid}, добавлено: {inserted}, обновлено: {updated}; '
+                   f'{elapsed:.2f} с, {rate:.0f} строк/с')
+        if options['dry_run']:
+            summary = f'[dry-run] {summary}'
+        self.stdout.write(self.style.SUCCESS(summary))
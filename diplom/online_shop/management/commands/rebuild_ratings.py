@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from online_shop.ratings import rebuild_product_ratings
+
+
+class Command(BaseCommand):
+    help = 'Пересчитывает rating_avg/rating_count всех товаров по отзывам'
+
+    def handle(self, *args, **options):
+        updated = rebuild_product_ratings()
+        self.stdout.write(self.style.SUCCESS(f'Пересчитан рейтинг товаров: {updated}'))
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from online_shop.statistics import refresh_sales_statistics
+
+
+class Command(BaseCommand):
+    help = 'Обновляет сводные таблицы статистики продаж по заказам, изменённым с прошлого запуска'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--full', action='store_true', help='Пересчитать всю историю заказов')
+
+    def handle(self, *args, **options):
+        days = refresh_sales_statistics(full=options['full'])
+        self.stdout.write(self.style.SUCCESS(f'Пересчитано дней: {days}'))
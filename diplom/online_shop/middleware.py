@@ -0,0 +1,132 @@
+import hashlib
+import json
+import logging
+import random
+import time
+from collections import Counter
+from contextlib import ExitStack
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.db import connections
+
+logger = logging.getLogger('online_shop.db')
+
+
+class QueryRecorder:
+    """execute_wrapper, собирающий статистику запросов к БД """
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+        self.fingerprints = Counter()
+        self.queries = []
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            duration = time.perf_counter() - start
+            self.count += 1
+            self.duration += duration
+            self.fingerprints[sql] += 1
+            self.queries.append((sql, params, duration))
+
+    def duplicates(self):
+        """Шаблоны запросов, выполненные больше одного раза """
+
+        return {
+            hashlib.md5(sql.encode()).hexdigest()[:12]: count
+            for sql, count in self.fingerprints.items() if count > 1
+        }
+
+
+class QueryInstrumentationMiddleware:
+    """Статистика запросов к БД на запрос: Server-Timing и лог
+
+    Включается для доли запросов DB_INSTRUMENTATION_SAMPLE_RATE; если время
+    запроса превышает DB_SLOW_REQUEST_MS, в лог пишется полный SQL.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if not self.sampled():
+            return self.get_response(request)
+
+        recorder = QueryRecorder()
+        start = time.perf_counter()
+        with self.recording(recorder):
+            response = self.get_response(request)
+        return self.finish(request, response, recorder, start)
+
+    async def __acall__(self, request):
+        if not self.sampled():
+            return await self.get_response(request)
+
+        # Соединения с БД привязаны к потоку: обёртку ставим в том же потоке,
+        # где async ORM выполняет запросы (thread_sensitive)
+        recorder = QueryRecorder()
+        start = time.perf_counter()
+        stack = await sync_to_async(self.recording)(recorder)
+        try:
+            response = await self.get_response(request)
+        finally:
+            await sync_to_async(stack.close)()
+        return self.finish(request, response, recorder, start)
+
+    def sampled(self):
+        sample_rate = getattr(settings, 'DB_INSTRUMENTATION_SAMPLE_RATE', 1.0)
+        return sample_rate > 0 and random.random() < sample_rate
+
+    def recording(self, recorder):
+        stack = ExitStack()
+        for alias in connections:
+            stack.enter_context(connections[alias].execute_wrapper(recorder))
+        return stack
+
+    def finish(self, request, response, recorder, start):
+        total_ms = (time.perf_counter() - start) * 1000
+        db_ms = recorder.duration * 1000
+
+        response['Server-Timing'] = (
+            f'db;dur={db_ms:.1f};desc="{recorder.count} queries", app;dur={total_ms:.1f}'
+        )
+
+        record = {
+            'method': request.method,
+            'path': request.path,
+            'view': getattr(request, 'instrumented_view', None),
+            'status': response.status_code,
+            'queries': recorder.count,
+            'db_ms': round(db_ms, 1),
+            'total_ms': round(total_ms, 1),
+            'duplicates': recorder.duplicates(),
+        }
+        if total_ms >= getattr(settings, 'DB_SLOW_REQUEST_MS', 500):
+            record['sql'] = [
+                {'sql': sql, 'params': repr(params), 'ms': round(duration * 1000, 2)}
+                for sql, params, duration in recorder.queries
+            ]
+            logger.warning(json.dumps(record, ensure_ascii=False))
+        else:
+            logger.info(json.dumps(record, ensure_ascii=False))
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        view_class = getattr(view_func, 'cls', None)
+        if view_class is None:
+            request.instrumented_view = f'{view_func.__module__}.{view_func.__name__}'
+            return None
+        action = (getattr(view_func, 'actions', None) or {}).get(request.method.lower())
+        request.instrumented_view = f'{view_class.__name__}.{action}' if action else view_class.__name__
+        return None
@@ -0,0 +1,31 @@
+# Generated by Django 5.2.18 on 2026-10-18 18:50
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('online_shop', '0004_productcollections_user'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='orders',
+            index=models.Index(fields=['created_at', 'id'], name='orders_created_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='productcollections',
+            index=models.Index(fields=['created_at', 'id'], name='collections_created_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='productreviews',
+            index=models.Index(fields=['created_at', 'id'], name='reviews_created_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='products',
+            index=models.Index(fields=['created_at', 'id'], name='products_created_id_idx'),
+        ),
+    ]
@@ -0,0 +1,61 @@
+# Generated by Django 5.2.18 on 2026-10-18 18:53
+
+from django.db import migrations, models
+from django.db.models import Avg, Count, FloatField, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+
+
+def rebuild_ratings(apps, schema_editor):
+    """Пересчёт рейтингов, зафиксированный на момент миграции
+
+    Не использует online_shop.ratings: та сбрасывает кеш каталога и
+    обновляет updated_at, а миграции не должны зависеть от кеша.
+    """
+
+    Products = apps.get_model('online_shop', 'Products')
+    ProductReviews = apps.get_model('online_shop', 'ProductReviews')
+
+    def aggregate(expression):
+        return Subquery(
+            ProductReviews.objects.filter(product_id=OuterRef('pk'))
+            .order_by()
+            .values('product_id')
+            .annotate(value=expression)
+            .values('value')
+        )
+
+    Products.objects.update(
+        rating_sum=Coalesce(aggregate(Sum('rate')), 0),
+        rating_count=Coalesce(aggregate(Count('id')), 0),
+        rating_avg=Coalesce(aggregate(Avg('rate', output_field=FloatField())), Value(0.0)),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('online_shop', '0005_created_at_id_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='products',
+            name='rating_avg',
+            field=models.FloatField(default=0, editable=False, verbose_name='Средняя оценка'),
+        ),
+        migrations.AddField(
+            model_name='products',
+            name='rating_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Количество отзывов'),
+        ),
+        migrations.AddField(
+            model_name='products',
+            name='rating_sum',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Сумма оценок'),
+        ),
+        migrations.AddIndex(
+            model_name='products',
+            index=models.Index(fields=['rating_avg'], name='products_rating_avg_idx'),
+        ),
+        migrations.RunPython(rebuild_ratings, migrations.RunPython.noop),
+    ]
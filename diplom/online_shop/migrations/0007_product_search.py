@@ -0,0 +1,65 @@
+# Generated by Django 5.2.18 on 2026-10-18 19:05
+
+import django.contrib.postgres.search
+from django.contrib.postgres.operations import TrigramExtension
+from django.db import migrations
+
+SEARCH_VECTOR_SQL = """
+    setweight(to_tsvector('pg_catalog.russian', coalesce({row}name, '')), 'A') ||
+    setweight(to_tsvector('pg_catalog.russian', coalesce({row}description, '')), 'B')
+"""
+
+FORWARD_SQL = [
+    """
+    CREATE OR REPLACE FUNCTION online_shop_products_search_vector_update() RETURNS trigger AS $$
+    BEGIN
+        NEW.search_vector := {vector};
+        RETURN NEW;
+    END
+    $$ LANGUAGE plpgsql;
+    """.format(vector=SEARCH_VECTOR_SQL.format(row='NEW.')),
+    """
+    CREATE TRIGGER online_shop_products_search_vector_trigger
+    BEFORE INSERT OR UPDATE OF name, description ON online_shop_products
+    FOR EACH ROW EXECUTE PROCEDURE online_shop_products_search_vector_update();
+    """,
+    'UPDATE online_shop_products SET search_vector = {vector};'.format(
+        vector=SEARCH_VECTOR_SQL.format(row='')
+    ),
+    'CREATE INDEX products_search_vector_idx ON online_shop_products USING gin (search_vector);',
+    'CREATE INDEX products_name_trgm_idx ON online_shop_products USING gin (name gin_trgm_ops);',
+]
+
+BACKWARD_SQL = [
+    'DROP INDEX IF EXISTS products_name_trgm_idx;',
+    'DROP INDEX IF EXISTS products_search_vector_idx;',
+    'DROP TRIGGER IF EXISTS online_shop_products_search_vector_trigger ON online_shop_products;',
+    'DROP FUNCTION IF EXISTS online_shop_products_search_vector_update();',
+]
+
+
+def run_on_postgresql(statements):
+    def operation(apps, schema_editor):
+        if schema_editor.connection.vendor != 'postgresql':
+            return
+        for statement in statements:
+            schema_editor.execute(statement)
+
+    return operation
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('online_shop', '0006_product_rating'),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        migrations.AddField(
+            model_name='products',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.RunPython(run_on_postgresql(FORWARD_SQL), run_on_postgresql(BACKWARD_SQL)),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 19:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('online_shop', '0007_product_search'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='products',
+            name='supplier_sku',
+            field=models.CharField(blank=True, max_length=64, null=True, unique=True, verbose_name='Артикул поставщика'),
+        ),
+    ]
@@ -0,0 +1,64 @@
+# Generated by Django 5.2.18 on 2026-10-18 19:04
+
+from django.db import migrations
+from django.db.models import Avg, Count, FloatField, Min, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+
+
+def rebuild_ratings(apps, schema_editor):
+    """Рейтинги после удаления дублей отзывов, как в 0006 (без кода приложения) """
+
+    Products = apps.get_model('online_shop', 'Products')
+    ProductReviews = apps.get_model('online_shop', 'ProductReviews')
+
+    def aggregate(expression):
+        return Subquery(
+            ProductReviews.objects.filter(product_id=OuterRef('pk'))
+            .order_by()
+            .values('product_id')
+            .annotate(value=expression)
+            .values('value')
+        )
+
+    Products.objects.update(
+        rating_sum=Coalesce(aggregate(Sum('rate')), 0),
+        rating_count=Coalesce(aggregate(Count('id')), 0),
+        rating_avg=Coalesce(aggregate(Avg('rate', output_field=FloatField())), Value(0.0)),
+    )
+
+
+def remove_duplicates(apps, schema_editor):
+    """Оставляет по одной строке на пару до создания ограничений
+
+    Количество в дублирующихся позициях заказа суммируется, чтобы не менять
+    стоимость заказа; для отзывов сохраняется самый ранний.
+    """
+
+    ProductOrder = apps.get_model('online_shop', 'ProductOrder')
+    duplicates = (ProductOrder.objects.values('order_id', 'product_id')
+                  .annotate(keep=Min('id'), total=Sum('quantity'), rows=Count('id'))
+                  .filter(rows__gt=1))
+    for group in duplicates:
+        ProductOrder.objects.filter(id=group['keep']).update(quantity=group['total'])
+        ProductOrder.objects.filter(order_id=group['order_id'], product_id=group['product_id']) \
+            .exclude(id=group['keep']).delete()
+
+    for model_name, fields in (('ProductReviews', ('user_id', 'product_id_id')),
+                               ('ProductCollectionsProducts', ('collection_id', 'product_id'))):
+        model = apps.get_model('online_shop', model_name)
+        duplicates = model.objects.values(*fields).annotate(keep=Min('id'), rows=Count('id')).filter(rows__gt=1)
+        for group in duplicates:
+            model.objects.filter(**{field: group[field] for field in fields}).exclude(id=group['keep']).delete()
+
+    rebuild_ratings(apps, schema_editor)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('online_shop', '0008_products_supplier_sku'),
+    ]
+
+    operations = [
+        migrations.RunPython(remove_duplicates, migrations.RunPython.noop),
+    ]
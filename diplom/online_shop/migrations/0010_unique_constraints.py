@@ -0,0 +1,27 @@
+# Generated by Django 5.2.18 on 2026-10-18 19:04
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('online_shop', '0009_remove_duplicate_pairs'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddConstraint(
+            model_name='productcollectionsproducts',
+            constraint=models.UniqueConstraint(fields=('collection', 'product'), name='unique_collection_product'),
+        ),
+        migrations.AddConstraint(
+            model_name='productorder',
+            constraint=models.UniqueConstraint(fields=('order', 'product'), name='unique_order_product'),
+        ),
+        migrations.AddConstraint(
+            model_name='productreviews',
+            constraint=models.UniqueConstraint(fields=('user', 'product_id'), name='unique_review_user_product'),
+        ),
+    ]
@@ -0,0 +1,43 @@
+# Generated by Django 5.2.18 on 2026-10-18 19:06
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('online_shop', '0010_unique_constraints'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='orders',
+            index=models.Index(fields=['user', 'created_at', 'id'], name='orders_user_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='orders',
+            index=models.Index(fields=['status', 'created_at', 'id'], name='orders_status_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='orders',
+            index=models.Index(fields=['updated_at'], name='orders_updated_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='orders',
+            index=models.Index(fields=['price_cart'], name='orders_price_cart_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='orders',
+            index=models.Index(condition=models.Q(('status', 'DONE'), _negated=True), fields=['created_at', 'id'], name='orders_open_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='productreviews',
+            index=models.Index(fields=['product_id', 'created_at', 'id'], name='reviews_product_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='products',
+            index=models.Index(fields=['price'], name='products_price_idx'),
+        ),
+    ]
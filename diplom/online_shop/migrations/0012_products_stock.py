@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 19:13
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('online_shop', '0011_filter_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='products',
+            name='stock',
+            field=models.PositiveIntegerField(blank=True, null=True, verbose_name='Остаток'),
+        ),
+    ]
@@ -0,0 +1,51 @@
+# Generated by Django 5.2.18 on 2026-10-18 19:15
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models.functions import Concat, Trim
+
+
+def strip_statuses(apps, schema_editor):
+    """Убирает хвостовые пробелы из статусов ('NEW ' -> 'NEW') одним UPDATE """
+
+    Orders = apps.get_model('online_shop', 'Orders')
+    Orders.objects.exclude(status=Trim('status')).update(status=Trim('status'))
+
+
+def restore_statuses(apps, schema_editor):
+    Orders = apps.get_model('online_shop', 'Orders')
+    Orders.objects.filter(status__in=['NEW', 'IN_PROGRESS']).update(status=Concat('status', models.Value(' ')))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('online_shop', '0012_products_stock'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='orders',
+            name='status',
+            field=models.CharField(choices=[('NEW', 'Новый'), ('IN_PROGRESS', 'В процессе'), ('DONE', 'Завершено')], default='NEW', max_length=128),
+        ),
+        migrations.RunPython(strip_statuses, restore_statuses),
+        migrations.CreateModel(
+            name='OrderStatusTransition',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('from_status', models.CharField(choices=[('NEW', 'Новый'), ('IN_PROGRESS', 'В процессе'), ('DONE', 'Завершено')], max_length=128)),
+                ('to_status', models.CharField(choices=[('NEW', 'Новый'), ('IN_PROGRESS', 'В процессе'), ('DONE', 'Завершено')], max_length=128)),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Дата перехода')),
+                ('order', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='transitions', to='online_shop.orders')),
+                ('user', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Переход статуса заказа',
+                'verbose_name_plural': 'Переходы статусов заказов',
+                'indexes': [models.Index(fields=['order', 'created_at'], name='transitions_order_created_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 5.2.18 on 2026-10-18 21:40
+
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+
+
+def fill_prices(apps, schema_editor):
+    # Для уже оформленных заказов известна только текущая цена товара
+    ProductOrder = apps.get_model('online_shop', 'ProductOrder')
+    Products = apps.get_model('online_shop', 'Products')
+    ProductOrder.objects.update(
+        price=Subquery(Products.objects.filter(pk=OuterRef('product_id')).values('price')[:1])
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('online_shop', '0014_sales_statistics'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='productorder',
+            name='price',
+            field=models.PositiveIntegerField(null=True, verbose_name='Цена на момент заказа'),
+        ),
+        migrations.RunPython(fill_prices, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='productorder',
+            name='price',
+            field=models.PositiveIntegerField(verbose_name='Цена на момент заказа'),
+        ),
+    ]
@@ -1,3 +1,4 @@
+from django.contrib.postgres.search import SearchVectorField
 from django.db import models
 from django.conf import settings
 from django.core.validators import MaxValueValidator, MinValueValidator
@@ -9,12 +10,26 @@ class Products(models.Model):
     name = models.CharField(max_length=128, verbose_name='Наименование')
     description = models.TextField(default='', verbose_name='Описание')
     price = models.PositiveIntegerField(null=False, verbose_name='Цена')
+    # NULL — остаток не ведётся, товар заказывается без ограничений
+    stock = models.PositiveIntegerField(null=True, blank=True, verbose_name='Остаток')
+    supplier_sku = models.CharField(max_length=64, unique=True, null=True, blank=True,
+                                    verbose_name='Артикул поставщика')
+    rating_sum = models.PositiveIntegerField(default=0, editable=False, verbose_name='Сумма оценок')
+    rating_count = models.PositiveIntegerField(default=0, editable=False, verbose_name='Количество отзывов')
+    rating_avg = models.FloatField(default=0, editable=False, verbose_name='Средняя оценка')
+    # Заполняется триггером БД (миграция 0007)
+    search_vector = SearchVectorField(null=True, editable=False)
     created_at = models.DateTimeField(auto_now_add=True, verbose_name='Дата создания')
     updated_at = models.DateTimeField(auto_now=True, verbose_name='Дата обновления')
 
     class Meta:
         verbose_name = 'Товар'
         verbose_name_plural = 'Товары'
+        indexes = [
+            models.Index(fields=['created_at', 'id'], name='products_created_id_idx'),
+            models.Index(fields=['rating_avg'], name='products_rating_avg_idx'),
+            models.Index(fields=['price'], name='products_price_idx'),
+        ]
 
     def __str__(self):
         return self.name
@@ -39,6 +54,13 @@ class ProductReviews(models.Model):
     class Meta:
         verbose_name = 'Отзыв'
         verbose_name_plural = 'Отзывы'
+        indexes = [
+            models.Index(fields=['created_at', 'id'], name='reviews_created_id_idx'),
+            models.Index(fields=['product_id', 'created_at', 'id'], name='reviews_product_created_idx'),
+        ]
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'product_id'], name='unique_review_user_product'),
+        ]
 
     def __str__(self):
         return self.text
@@ -47,9 +69,17 @@ class ProductReviews(models.Model):
 class OrderStatusChoices(models.TextChoices):
     """Статусы заказов"""
 
-    NEW = "NEW ", "Новый"
-    IN_PROGRESS = "IN_PROGRESS ", "В процессе"
-    DONE = 'DONE', " Завершено"
+    NEW = "NEW", "Новый"
+    IN_PROGRESS = "IN_PROGRESS", "В процессе"
+    DONE = 'DONE', "Завершено"
+
+
+# Допустимые переходы статусов: из какого статуса в какие
+ORDER_STATUS_TRANSITIONS = {
+    OrderStatusChoices.NEW: (OrderStatusChoices.IN_PROGRESS,),
+    OrderStatusChoices.IN_PROGRESS: (OrderStatusChoices.DONE,),
+    OrderStatusChoices.DONE: (),
+}
 
 
 class Orders(models.Model):
@@ -72,6 +102,16 @@ class Orders(models.Model):
     class Meta:
         verbose_name = 'Заказ'
         verbose_name_plural = 'Заказы'
+        indexes = [
+            models.Index(fields=['created_at', 'id'], name='orders_created_id_idx'),
+            models.Index(fields=['user', 'created_at', 'id'], name='orders_user_created_idx'),
+            models.Index(fields=['status', 'created_at', 'id'], name='orders_status_created_idx'),
+            models.Index(fields=['updated_at'], name='orders_updated_idx'),
+            models.Index(fields=['price_cart'], name='orders_price_cart_idx'),
+            # Незавершённые заказы — малая и часто запрашиваемая часть таблицы
+            models.Index(fields=['created_at', 'id'], name='orders_open_created_idx',
+                         condition=~models.Q(status=OrderStatusChoices.DONE)),
+        ]
 
     def __str__(self):
         return f'Товары:{self.cart} на сумму {self.price_cart}'
@@ -82,8 +122,35 @@ class ProductOrder(models.Model):
 
     product = models.ForeignKey(Products, on_delete=models.CASCADE)
     quantity = models.IntegerField(validators=[MinValueValidator(1)])
+    price = models.PositiveIntegerField(verbose_name='Цена на момент заказа')
     order = models.ForeignKey(Orders, on_delete=models.CASCADE, related_name='positions')
 
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['order', 'product'], name='unique_order_product'),
+        ]
+
+
+class OrderStatusTransition(models.Model):
+    """ История переходов статусов заказа """
+
+    order = models.ForeignKey(Orders, on_delete=models.CASCADE, related_name='transitions')
+    from_status = models.CharField(max_length=128, choices=OrderStatusChoices.choices)
+    to_status = models.CharField(max_length=128, choices=OrderStatusChoices.choices)
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        null=True,
+    )
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name='Дата перехода')
+
+    class Meta:
+        verbose_name = 'Переход статуса заказа'
+        verbose_name_plural = 'Переходы статусов заказов'
+        indexes = [
+            models.Index(fields=['order', 'created_at'], name='transitions_order_created_idx'),
+        ]
+
 
 class ProductCollections(models.Model):
     """ Подборки """
@@ -101,6 +168,9 @@ class ProductCollections(models.Model):
     class Meta:
         verbose_name = 'Подборка'
         verbose_name_plural = 'Подборки'
+        indexes = [
+            models.Index(fields=['created_at', 'id'], name='collections_created_id_idx'),
+        ]
 
     def __str__(self):
         return self.name
@@ -111,3 +181,60 @@ class ProductCollectionsProducts(models.Model):
 
     product = models.ForeignKey(Products, on_delete=models.CASCADE)
     collection = models.ForeignKey(ProductCollections, on_delete=models.CASCADE, related_name='products_list')
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['collection', 'product'], name='unique_collection_product'),
+        ]
+
+
+class ProductSalesDaily(models.Model):
+    """ Продажи товара за день (сводная таблица, см. refresh_statistics) """
+
+    day = models.DateField(verbose_name='День')
+    product = models.ForeignKey(Products, on_delete=models.CASCADE, related_name='sales')
+    quantity = models.PositiveIntegerField(default=0, verbose_name='Продано штук')
+    revenue = models.BigIntegerField(default=0, verbose_name='Выручка')
+    orders_count = models.PositiveIntegerField(default=0, verbose_name='Заказов')
+
+    class Meta:
+        verbose_name = 'Продажи товара за день'
+        verbose_name_plural = 'Продажи товаров по дням'
+        constraints = [
+            models.UniqueConstraint(fields=['day', 'product'], name='unique_product_sales_day'),
+        ]
+        indexes = [
+            models.Index(fields=['product', 'day'], name='product_sales_product_day_idx'),
+        ]
+
+
+class DailySales(models.Model):
+    """ Заказы и выручка за день (сводная таблица, см. refresh_statistics) """
+
+    day = models.DateField(unique=True, verbose_name='День')
+    orders_count = models.PositiveIntegerField(default=0, verbose_name='Заказов')
+    revenue = models.BigIntegerField(default=0, verbose_name='Выручка')
+
+    class Meta:
+        verbose_name = 'Продажи за день'
+        verbose_name_plural = 'Продажи по дням'
+
+
+class StatisticsState(models.Model):
+    """ Состояние инкрементального пересчёта статистики (одна строка)
+
+    watermark — максимальный Orders.updated_at, уже учтённый в сводных таблицах.
+    """
+
+    watermark = models.DateTimeField(null=True, blank=True)
+    refreshed_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        verbose_name = 'Состояние статистики'
+        verbose_name_plural = 'Состояние статистики'
+
+
+class StatisticsDirtyDay(models.Model):
+    """ День, который нужно пересчитать: удалённые заказы не видны по updated_at """
+
+    day = models.DateField(unique=True)
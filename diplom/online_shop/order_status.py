@@ -0,0 +1,47 @@
+from django.db import transaction
+from django.utils import timezone
+from rest_framework import serializers
+
+from .models import ORDER_STATUS_TRANSITIONS, Orders, OrderStatusTransition
+
+
+def allowed_sources(to_status):
+    """Статусы, из которых разрешён переход в to_status """
+
+    return [status for status, targets in ORDER_STATUS_TRANSITIONS.items() if to_status in targets]
+
+
+def check_transition(from_status, to_status):
+    if to_status not in ORDER_STATUS_TRANSITIONS.get(from_status, ()):
+        raise serializers.ValidationError(
+            {'status': [f'Недопустимый переход статуса: {from_status} -> {to_status}']}
+        )
+
+
+@transaction.atomic
+def transition_orders(order_ids, to_status, user):
+    """Переводит заказы в статус to_status: один UPDATE и одна вставка истории
+
+    Заказы, для которых переход недопустим (или которых нет), отклоняют
+    всю пачку. Строки блокируются SELECT FOR UPDATE, чтобы параллельный
+    переход не записал в историю устаревший исходный статус.
+    """
+
+    order_ids = set(order_ids)
+    eligible = dict(
+        Orders.objects.select_for_update()
+        .filter(pk__in=order_ids, status__in=allowed_sources(to_status))
+        .values_list('id', 'status')
+    )
+    rejected = sorted(order_ids - eligible.keys())
+    if rejected:
+        raise serializers.ValidationError(
+            {'ids': [f'Недопустимый переход в статус {to_status} для заказов: {rejected}']}
+        )
+
+    Orders.objects.filter(pk__in=eligible).update(status=to_status, updated_at=timezone.now())
+    OrderStatusTransition.objects.bulk_create([
+        OrderStatusTransition(order_id=order_id, from_status=from_status, to_status=to_status, user=user)
+        for order_id, from_status in eligible.items()
+    ], batch_size=1000)
+    return sorted(eligible)
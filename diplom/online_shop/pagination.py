@@ -0,0 +1,105 @@
+import json
+from functools import reduce
+from operator import or_
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import CursorPagination, _reverse_ordering
+
+
+def keyset_condition(ordering, values):
+    """Условие «строка после позиции values» для сортировки ordering
+
+    Для ('created_at', 'id'): created_at > x OR (created_at = x AND id > y).
+    """
+
+    conditions, equal = [], Q()
+    for field, value in zip(ordering, values):
+        name = field.lstrip('-')
+        lookup = '__lt' if field.startswith('-') else '__gt'
+        conditions.append(equal & Q(**{name + lookup: value}))
+        equal &= Q(**{name: value})
+    return reduce(or_, conditions)
+
+
+def keyset_position(instance, ordering):
+    """Значения полей сортировки ordering у instance строками """
+
+    return [str(instance[field.lstrip('-')] if isinstance(instance, dict) else getattr(instance, field.lstrip('-')))
+            for field in ordering]
+
+
+class CreatedAtCursorPagination(CursorPagination):
+    """Keyset-пагинация по (created_at, id)
+
+    Позиция в курсоре — значения всех полей сортировки, а не только первого,
+    как в CursorPagination. Следующая страница выбирается условием
+    created_at > x OR (created_at = x AND id > y), поэтому строкам с
+    одинаковым created_at не нужно смещение (offset, ограниченное
+    offset_cutoff), и выдача на них не зацикливается.
+    """
+
+    ordering = ('created_at', 'id')
+    page_size_query_param = 'page_size'
+
+    @property
+    def max_page_size(self):
+        return getattr(settings, 'API_MAX_PAGE_SIZE', 100)
+
+    def get_ordering(self, request, queryset, view):
+        # id в конце делает позицию уникальной и для ?ordering=price и т.п.
+        ordering = super().get_ordering(request, queryset, view)
+        if not {'id', 'pk'} & {field.lstrip('-') for field in ordering}:
+            ordering += ('id',)
+        return ordering
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        if not self.page_size:
+            return None
+
+        self.base_url = request.build_absolute_uri()
+        self.ordering = self.get_ordering(request, queryset, view)
+        self.cursor = self.decode_cursor(request)
+        reverse = self.cursor is not None and self.cursor.reverse
+        current_position = None if self.cursor is None else self.cursor.position
+
+        ordering = _reverse_ordering(self.ordering) if reverse else self.ordering
+        queryset = queryset.order_by(*ordering)
+        if current_position is not None:
+            queryset = self._after(queryset, ordering, current_position)
+
+        results = list(queryset[:self.page_size + 1])
+        self.page = results[:self.page_size]
+        following_position = None
+        if len(results) > len(self.page):
+            following_position = self._get_position_from_instance(results[-1], self.ordering)
+
+        if reverse:
+            self.page.reverse()
+            self.has_next, self.next_position = current_position is not None, current_position
+            self.has_previous, self.previous_position = following_position is not None, following_position
+        else:
+            self.has_next, self.next_position = following_position is not None, following_position
+            self.has_previous, self.previous_position = current_position is not None, current_position
+
+        if (self.has_previous or self.has_next) and self.template is not None:
+            self.display_page_controls = True
+        return self.page
+
+    def _after(self, queryset, ordering, position):
+        """Строки после position в порядке ordering """
+
+        try:
+            values = json.loads(position)
+            if not isinstance(values, list) or len(values) != len(ordering):
+                raise ValueError
+            return queryset.filter(keyset_condition(ordering, values))
+        except (TypeError, ValueError, ValidationError):
+            raise NotFound(self.invalid_cursor_message)
+
+    def _get_position_from_instance(self, instance, ordering):
+        return json.dumps(keyset_position(instance, ordering))
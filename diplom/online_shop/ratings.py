@@ -0,0 +1,53 @@
+from django.db.models import Avg, Case, Count, F, FloatField, OuterRef, Q, Subquery, Sum, Value, When
+from django.db.models.functions import Cast, Coalesce, Greatest
+from django.utils import timezone
+
+from .caching import bump_catalogue_version
+from .models import Products, ProductReviews
+
+
+def update_product_rating(product_id, rate_delta, count_delta):
+    """Инкрементально пересчитывает рейтинг товара одним UPDATE
+
+    Значения ограничены снизу нулём: отзывы, изменённые в обход API,
+    не должны ломать счётчики до следующего rebuild_ratings.
+    """
+
+    new_sum = Greatest(F('rating_sum') + rate_delta, 0)
+    new_count = Greatest(F('rating_count') + count_delta, 0)
+    Products.objects.filter(pk=product_id).update(
+        rating_sum=new_sum,
+        rating_count=new_count,
+        rating_avg=Case(
+            When(Q(rating_count__lte=-count_delta), then=Value(0.0)),
+            default=Cast(new_sum, FloatField()) / Cast(new_count, FloatField()),
+            output_field=FloatField(),
+        ),
+        updated_at=timezone.now(),
+    )
+    bump_catalogue_version()
+
+
+def rebuild_product_ratings(products=None):
+    """Полностью пересчитывает рейтинги всех товаров одним UPDATE """
+
+    if products is None:
+        products = Products.objects
+
+    def aggregate(expression):
+        return Subquery(
+            ProductReviews.objects.filter(product_id=OuterRef('pk'))
+            .order_by()
+            .values('product_id')
+            .annotate(value=expression)
+            .values('value')
+        )
+
+    updated = products.update(
+        rating_sum=Coalesce(aggregate(Sum('rate')), 0),
+        rating_count=Coalesce(aggregate(Count('id')), 0),
+        rating_avg=Coalesce(aggregate(Avg('rate', output_field=FloatField())), Value(0.0)),
+        updated_at=timezone.now(),
+    )
+    bump_catalogue_version()
+    return updated
@@ -0,0 +1,33 @@
+try:
+    import orjson
+except ImportError:  # orjson необязателен, без него работает обычный JSONRenderer
+    orjson = None
+
+from rest_framework.renderers import JSONRenderer
+
+ORJSON_OPTIONS = (orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME) if orjson else 0
+
+
+class FastJSONRenderer(JSONRenderer):
+    """JSONRenderer на orjson, если он установлен
+
+    datetime, date, Decimal, UUID, ленивые строки и прочее, что orjson не знает,
+    кодируются тем же JSONEncoder, что и у DRF, поэтому ответ совпадает по содержимому.
+    Отступ (?format=json; indent=4, Browsable API) и ensure_ascii обрабатывает
+    стандартный рендерер.
+    """
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        if orjson is None or self.ensure_ascii or self.get_indent(accepted_media_type, renderer_context or {}):
+            return super().render(data, accepted_media_type, renderer_context)
+
+        try:
+            ret = orjson.dumps(data, default=self.encoder_class().default, option=ORJSON_OPTIONS)
+        except orjson.JSONEncodeError:
+            # Например, целые за пределами 64 бит: их кодирует стандартный json
+            return super().render(data, accepted_media_type, renderer_context)
+        # Как и в JSONRenderer: \u2028 и \u2029 экранируются для совместимости с JavaScript
+        return ret.replace('\u2028'.encode(), b'\\u2028').replace('\u2029'.encode(), b'\\u2029')
+
@@ -0,0 +1,119 @@
+import hashlib
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.utils.deprecation import MiddlewareMixin
+from rest_framework.permissions import SAFE_METHODS
+
+from .caching import CATALOGUE_CHANGED_KEY, CatalogueCacheMixin
+
+_replica_reads = ContextVar('replica_reads', default=False)
+
+# Модели, которые всегда читаются с основной БД: токен, только что
+# выданный клиенту, мог ещё не доехать до реплики
+PRIMARY_ONLY_MODELS = {'authtoken.token'}
+
+REPLICA_PIN_COOKIE = 'db_pin'
+
+
+def replica_alias():
+    """Алиас реплики из DATABASE_REPLICA_ALIAS, если он есть в DATABASES """
+
+    alias = getattr(settings, 'DATABASE_REPLICA_ALIAS', None)
+    return alias if alias and alias in connections.settings else None
+
+
+@contextmanager
+def replica_reads(enabled=True):
+    """Чтение с реплики вне запроса: management-команды, скрипты """
+
+    token = _replica_reads.set(enabled)
+    try:
+        yield
+    finally:
+        _replica_reads.reset(token)
+
+
+class ReplicaRouter:
+    """Чтение на реплику внутри ReplicaRoutingMiddleware, запись всегда в default """
+
+    def db_for_read(self, model, **hints):
+        if not _replica_reads.get() or model._meta.label_lower in PRIMARY_ONLY_MODELS:
+            return None
+        return replica_alias()
+
+    def db_for_write(self, model, **hints):
+        # Явно, иначе объект, прочитанный с реплики, сохранялся бы туда же
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        databases = {DEFAULT_DB_ALIAS, replica_alias()}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Схему на реплику приносит репликация
+        if db == replica_alias():
+            return False
+        return None
+
+
+def pin_key(request):
+    authorization = request.META.get('HTTP_AUTHORIZATION')
+    if not authorization:
+        return None
+    return f'replica:pin:{hashlib.sha256(authorization.encode()).hexdigest()}'
+
+
+def is_pinned(request):
+    if request.COOKIES.get(REPLICA_PIN_COOKIE):
+        return True
+    key = pin_key(request)
+    return bool(key and cache.get(key))
+
+
+def pin_to_primary(request, response):
+    """Закрепляет клиента за основной БД на REPLICA_PIN_SECONDS после записи
+
+    Клиент определяется по заголовку Authorization (токен) и по cookie,
+    чтобы своё изменение было видно сразу, до догона реплики.
+    """
+
+    seconds = getattr(settings, 'REPLICA_PIN_SECONDS', 5)
+    key = pin_key(request)
+    if key:
+        cache.set(key, 1, seconds)
+    response.set_cookie(REPLICA_PIN_COOKIE, '1', max_age=seconds, httponly=True, samesite='Lax')
+
+
+def catalogue_recently_changed():
+    return bool(cache.get(CATALOGUE_CHANGED_KEY))
+
+
+class ReplicaRoutingMiddleware(MiddlewareMixin):
+    """Безопасные запросы к ViewSet с replica_reads = True читают с реплики
+
+    Ответы с CatalogueCacheMixin после изменения каталога читаются с основной
+    БД, пока не пройдёт REPLICA_PIN_SECONDS: они кешируются для всех клиентов.
+    """
+
+    def process_request(self, request):
+        _replica_reads.set(False)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        view_class = getattr(view_func, 'cls', None)
+        if (request.method in SAFE_METHODS and getattr(view_class, 'replica_reads', False)
+                and replica_alias() and not is_pinned(request)
+                and not (issubclass(view_class, CatalogueCacheMixin) and catalogue_recently_changed())):
+            _replica_reads.set(True)
+        return None
+
+    def process_response(self, request, response):
+        _replica_reads.set(False)
+        if request.method not in SAFE_METHODS and response.status_code < 400 and replica_alias():
+            pin_to_primary(request, response)
+        return response
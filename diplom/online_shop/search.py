@@ -0,0 +1,33 @@
+from django.contrib.postgres.search import SearchQuery, SearchRank, TrigramSimilarity
+from django.db import connection
+from django.db.models import F, FloatField, Q, Value
+from django.db.models.functions import Cast
+
+# Конфигурация полнотекстового поиска; должна совпадать с триггером из миграции 0007
+SEARCH_CONFIG = 'russian'
+
+
+def search_products(queryset, value):
+    """Поиск товаров с ранжированием по релевантности
+
+    На PostgreSQL совпадения ищутся по search_vector (GIN) и, для опечаток,
+    по trigram-сходству названия; в search_rank складываются обе оценки.
+    На остальных СУБД — icontains без ранжирования.
+    """
+
+    if connection.vendor != 'postgresql':
+        return queryset.filter(
+            Q(name__icontains=value) | Q(description__icontains=value)
+        ).annotate(search_rank=Value(0.0, output_field=FloatField()))
+
+    # Порог trigram-сходства — pg_trgm.similarity_threshold сервера (0.3 по умолчанию):
+    # оператор % пользуется GIN-индексом, а сравнение similarity() > x — нет
+    query = SearchQuery(value, config=SEARCH_CONFIG, search_type='websearch')
+    similarity = TrigramSimilarity('name', value)
+    # ts_rank и similarity возвращают real; в double precision значение из
+    # курсора пагинации совпадает с ним точно, и id разрешает равные оценки
+    return queryset.annotate(
+        search_rank=Cast(SearchRank(F('search_vector'), query) + similarity, FloatField()),
+    ).filter(
+        Q(search_vector=query) | Q(name__trigram_similar=value)
+    )
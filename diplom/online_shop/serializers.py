@@ -1,7 +1,54 @@
+from contextlib import contextmanager
+
+from django.apps import apps
 from django.contrib.auth.models import User
-from django.core.exceptions import ValidationError, ObjectDoesNotExist
+from django.core.exceptions import ValidationError
+from django.db import IntegrityError, transaction
+from django.db.models import F, Prefetch, Sum, prefetch_related_objects
+from django.utils import timezone
 from rest_framework import serializers
-from .models import Products, Orders, ProductReviews, ProductCollections, ProductOrder
+from .models import (Products, Orders, ProductReviews, ProductCollections, ProductCollectionsProducts, ProductOrder,
+                     OrderStatusChoices, OrderStatusTransition)
+from .order_status import check_transition
+from .stock import reserve_stock
+
+
+REVIEW_DUPLICATE_MESSAGE = 'Нельзя оставлять более одного отзыва к каждому товару'
+ORDER_DUPLICATE_MESSAGE = 'Дублируются позиции в заказе'
+COLLECTION_DUPLICATE_MESSAGE = 'Дублируются позиции в подборке'
+
+
+def violates_constraint(exc, name):
+    """Нарушено ли IntegrityError ограничение с именем name """
+
+    diag = getattr(exc.__cause__, 'diag', None)
+    if diag is not None:
+        return diag.constraint_name == name
+    if name in str(exc):
+        return True
+    # SQLite не называет ограничение, а перечисляет его столбцы
+    for model in apps.get_app_config('online_shop').get_models():
+        for constraint in model._meta.constraints:
+            if constraint.name == name:
+                columns = ', '.join(f'{model._meta.db_table}.{model._meta.get_field(field).column}'
+                                    for field in constraint.fields)
+                return str(exc) == f'UNIQUE constraint failed: {columns}'
+    return False
+
+
+@contextmanager
+def integrity_error_as(constraint, message):
+    """Превращает нарушение ограничения уникальности constraint в ошибку валидации
+
+    Остальные IntegrityError (внешние ключи, CHECK, NOT NULL) пробрасываются как есть.
+    """
+
+    try:
+        yield
+    except IntegrityError as exc:
+        if not violates_constraint(exc, constraint):
+            raise
+        raise serializers.ValidationError(message)
 
 
 class UserSerializer(serializers.ModelSerializer):
@@ -13,36 +60,134 @@ class UserSerializer(serializers.ModelSerializer):
                   'last_name',)
 
 
+class PrefetchedProductField(serializers.PrimaryKeyRelatedField):
+    """PrimaryKeyRelatedField, берущий товары из загруженных списком """
+
+    def to_internal_value(self, data):
+        products = getattr(self.parent, 'prefetched_products', None)
+        if products is None:
+            return super().to_internal_value(data)
+        try:
+            return products[int(data)]
+        except KeyError:
+            self.fail('does_not_exist', pk_value=data)
+        except (TypeError, ValueError):
+            self.fail('incorrect_type', data_type=type(data).__name__)
+
+
+class PrefetchProductsMixin:
+    """Загружает товары всех элементов списка одним запросом """
+
+    product_field = 'product'
+
+    def to_internal_value(self, data):
+        if isinstance(data, list):
+            ids = set()
+            for item in data:
+                try:
+                    ids.add(int(item[self.product_field]))
+                except (KeyError, TypeError, ValueError):
+                    pass
+            self.child.prefetched_products = Products.objects.in_bulk(ids)
+        try:
+            return super().to_internal_value(data)
+        finally:
+            self.child.prefetched_products = None
+
+
+class ProductListSerializer(PrefetchProductsMixin, serializers.ListSerializer):
+    """ListSerializer для позиций с товарами """
+
+
+class BulkListSerializer(serializers.ListSerializer):
+    """ListSerializer, сохраняющий объекты через bulk_create/bulk_update """
+
+    def create(self, validated_data):
+        model = self.child.Meta.model
+        return model.objects.bulk_create([model(**attrs) for attrs in validated_data])
+
+    def update(self, instances, validated_data):
+        now = timezone.now()
+        fields = {'updated_at'}
+        for instance, attrs in zip(instances, validated_data):
+            for field, value in attrs.items():
+                setattr(instance, field, value)
+                fields.add(field)
+            instance.updated_at = now
+        self.child.Meta.model.objects.bulk_update(instances, fields)
+        return instances
+
+
 class ProductSerializer(serializers.ModelSerializer):
     """Serializer для товаров """
 
     class Meta:
         model = Products
-        fields = ('id', 'name', 'description', 'price',
+        fields = ('id', 'name', 'description', 'price', 'stock',
+                  'rating_avg', 'rating_count',
                   'created_at', 'updated_at',)
+        read_only_fields = ('rating_avg', 'rating_count',)
+        list_serializer_class = BulkListSerializer
+
+
+class ProductReviewsBulkListSerializer(PrefetchProductsMixin, BulkListSerializer):
+    """Проверка «один отзыв на товар» для всей пачки одним запросом """
+
+    product_field = 'product_id'
+
+    @integrity_error_as('unique_review_user_product', REVIEW_DUPLICATE_MESSAGE)
+    def create(self, validated_data):
+        return super().create(validated_data)
+
+    def to_internal_value(self, data):
+        value = super().to_internal_value(data)
+        if self.instance is not None:
+            return value
+
+        user = self.context['request'].user
+        product_ids = [attrs['product_id'].id for attrs in value]
+        reviewed = set(ProductReviews.objects.filter(user=user, product_id__in=product_ids)
+                       .values_list('product_id', flat=True))
+        errors, seen = [], set()
+        for product_id in product_ids:
+            if product_id in reviewed or product_id in seen:
+                errors.append({'product_id': [REVIEW_DUPLICATE_MESSAGE]})
+            else:
+                errors.append({})
+            seen.add(product_id)
+        if any(errors):
+            raise serializers.ValidationError(errors)
+        return value
 
 
 class ProductReviewsSerializers(serializers.ModelSerializer):
     """Serializer для отзывов """
 
     user = serializers.IntegerField(read_only=True, source='user.id')
+    product_id = PrefetchedProductField(queryset=Products.objects.all())
 
     class Meta:
         model = ProductReviews
         fields = '__all__'
+        list_serializer_class = ProductReviewsBulkListSerializer
+        # Уникальность (user, product_id) обеспечивает ограничение БД
+        validators = []
 
+    @integrity_error_as('unique_review_user_product', REVIEW_DUPLICATE_MESSAGE)
     def create(self, validated_data):
         return super().create(validated_data)
 
     def validate(self, attrs):
         user = self.context['request'].user
+        action = self.context['view'].action
+        bulk_create = action == 'bulk' and self.context['request'].method == 'POST'
 
-        if self.context['view'].action == 'create':
-            if ProductReviews.objects.filter(user=user, product_id=attrs['product_id']):
-                raise ValidationError(f'Нельзя оставлять более одного отзыва к каждому товару')
+        if action == 'create' or bulk_create:
+            # Повторный отзыв отсекает ограничение unique_review_user_product,
+            # для пачки — ещё и проверка в ProductReviewsBulkListSerializer
             attrs['user'] = user
 
-        elif self.context['view'].action in ['update', 'partial_update']:
+        elif action in ['update', 'partial_update', 'bulk']:
             fields = ('text', 'rate',)
             if not set(attrs.keys()).issubset(fields):
                 raise ValidationError(f'Изменить можно только поля {fields}')
@@ -53,10 +198,13 @@ class ProductReviewsSerializers(serializers.ModelSerializer):
 class ProductOrderSerializer(serializers.Serializer):
     """Serializer для positions в заказах """
 
-    product = serializers.PrimaryKeyRelatedField(queryset=Products.objects.all(), required=True, )
+    product = PrefetchedProductField(queryset=Products.objects.all(), required=True, )
 
     quantity = serializers.IntegerField(min_value=1, default=1)
 
+    class Meta:
+        list_serializer_class = ProductListSerializer
+
 
 class OrdersSerializer(serializers.ModelSerializer):
     """Serializer для заказов """
@@ -67,18 +215,23 @@ class OrdersSerializer(serializers.ModelSerializer):
         model = Orders
         fields = ('id', 'status', 'cart', 'created_at', 'updated_at', 'positions')
 
+    @integrity_error_as('unique_order_product', ORDER_DUPLICATE_MESSAGE)
+    @transaction.atomic
     def create(self, validated_data):
         """Метод для создания"""
 
         validated_data["user"] = self.context["request"].user
         positions = validated_data.pop('positions')
-        for item in positions:
-            ProductOrder(product=item['product'],
-                         quantity=item['quantity'],
-                         order=super().create(validated_data)
-                         ).save()
+        reserve_stock({item['product'].id: item['quantity'] for item in positions
+                       if item['product'].stock is not None})
+        order = super().create(validated_data)
+        ProductOrder.objects.bulk_create([
+            ProductOrder(product=item['product'], quantity=item['quantity'], price=item['product'].price,
+                         order=order)
+            for item in positions
+        ])
 
-        return super().create(validated_data)
+        return order
 
     def validate(self, value):
         user = self.context['request'].user
@@ -88,11 +241,13 @@ class OrdersSerializer(serializers.ModelSerializer):
                 raise serializers.ValidationError("Не указаны позиции заказа")
             product_ids = [item["product"].id for item in positions]
             if len(product_ids) != len(set(product_ids)):
-                raise serializers.ValidationError("Дублируются позиции в заказе")
+                raise serializers.ValidationError(ORDER_DUPLICATE_MESSAGE)
 
             price_cart = sum(item['product'].price * item['quantity'] for item in positions)
             value['user'] = user
             value['price_cart'] = price_cart
+            # Статус при создании не задаётся: заказ проходит ORDER_STATUS_TRANSITIONS с NEW
+            value['status'] = OrderStatusChoices.NEW
 
         elif self.context['view'].action in ['update', 'partial_update']:
             if user.is_staff:
@@ -101,70 +256,149 @@ class OrdersSerializer(serializers.ModelSerializer):
                 fields = ('positions',)
             if not set(value.keys()).issubset(fields):
                 raise ValidationError(f'Изменить можно только поля {fields}')
+            if 'status' in value and value['status'] != self.instance.status:
+                check_transition(self.instance.status, value['status'])
+            product_ids = [item["product"].id for item in value.get("positions", [])]
+            if len(product_ids) != len(set(product_ids)):
+                raise serializers.ValidationError(ORDER_DUPLICATE_MESSAGE)
 
         return value
 
+    @integrity_error_as('unique_order_product', ORDER_DUPLICATE_MESSAGE)
+    @transaction.atomic
     def update(self, instance, validated_data):
-        positions = validated_data.get('positions', [])
-        for item in positions:
-            try:
-                cart = ProductOrder.objects.get(product_id=item['product']['id'].id,
-                                                order=instance
-                                                )
-                cart.quantity = item['quantity']
-                cart.save()
-            except ObjectDoesNotExist:
-                self.create(validated_data)
-
-        value = ProductOrder.objects.filter(order=instance)
-        price_cart = sum([item.product.price * item.quantity for item in value])
-        if price_cart > 0:
-            validated_data['price_cart'] = price_cart
+        positions = validated_data.pop('positions', None)
+        if positions is not None:
+            existing = {item.product_id: item for item in instance.positions.all()}
+            reserve_stock({
+                item['product'].id: item['quantity'] - getattr(existing.get(item['product'].id), 'quantity', 0)
+                for item in positions if item['product'].stock is not None
+            })
+            to_update, to_create = [], []
+            for item in positions:
+                position = existing.get(item['product'].id)
+                if position is None:
+                    to_create.append(ProductOrder(product=item['product'],
+                                                  quantity=item['quantity'],
+                                                  price=item['product'].price,
+                                                  order=instance))
+                else:
+                    position.quantity = item['quantity']
+                    to_update.append(position)
+            ProductOrder.objects.bulk_update(to_update, ['quantity'])
+            ProductOrder.objects.bulk_create(to_create)
 
-        return super().update(instance, validated_data)
+            price_cart = ProductOrder.objects.filter(order=instance).aggregate(
+                total=Sum(F('price') * F('quantity'))
+            )['total']
+            if price_cart:
+                validated_data['price_cart'] = price_cart
+
+        previous_status = instance.status
+        order = super().update(instance, validated_data)
+        if order.status != previous_status:
+            OrderStatusTransition.objects.create(order=order, from_status=previous_status,
+                                                 to_status=order.status, user=self.context['request'].user)
+        return order
+
+
+class OrderTransitionSerializer(serializers.Serializer):
+    """Serializer для смены статуса заказа """
+
+    status = serializers.ChoiceField(choices=OrderStatusChoices.choices)
+
+
+class BulkOrderTransitionSerializer(OrderTransitionSerializer):
+    """Serializer для смены статуса пачки заказов """
+
+    ids = serializers.ListField(child=serializers.IntegerField(), allow_empty=False, max_length=10000)
+
+
+def collection_products_queryset():
+    """Товары подборок для вывода: только поля, которые отдаёт API """
+
+    return ProductCollectionsProducts.objects.select_related('product').only(
+        'id', 'collection_id', 'product__id', 'product__name', 'product__price',
+    )
 
 
 class ProductCollectionsProductsSerializer(serializers.Serializer):
     """Serializer для products в подборках """
 
-    product = serializers.PrimaryKeyRelatedField(queryset=Products.objects.all(), required=True)
-    name = serializers.CharField(source='products.name', required=True)
-    price = serializers.CharField(source='products.price', required=True)
+    product = PrefetchedProductField(queryset=Products.objects.all(), required=True)
+    name = serializers.CharField(source='product.name', read_only=True)
+    price = serializers.IntegerField(source='product.price', read_only=True)
+
+    class Meta:
+        list_serializer_class = ProductListSerializer
 
 
 class ProductCollectionsSerializer(serializers.ModelSerializer):
     """Serializer для подборок """
 
-    products = ProductCollectionsProductsSerializer(many=True, required=True)
+    products = ProductCollectionsProductsSerializer(many=True, required=True, source='products_list')
     user = serializers.IntegerField(read_only=True, source='user.id')
 
     class Meta:
         model = ProductCollections
         fields = '__all__'
 
+    @integrity_error_as('unique_collection_product', COLLECTION_DUPLICATE_MESSAGE)
+    @transaction.atomic
     def create(self, validated_data):
         products = validated_data.pop('products_list')
-        for item in products:
-            Products(id=item['product'].id).save()
+        collection = super().create(validated_data)
+        ProductCollectionsProducts.objects.bulk_create([
+            ProductCollectionsProducts(collection=collection, product=item['product'])
+            for item in products
+        ])
 
-        return super().create(validated_data)
+        return collection
 
     def validate(self, attrs):
         products = attrs.get('products_list')
-        attrs["user"] = self.context['request'].user
         if self.context['view'].action == 'create':
+            attrs["user"] = self.context['request'].user
             if not products:
                 raise serializers.ValidationError("Не указаны товары")
+        if products is not None:
             product_ids = [item["product"].id for item in products]
             if len(product_ids) != len(set(product_ids)):
-                raise serializers.ValidationError("Дублируются позиции в подборке")
+                raise serializers.ValidationError(COLLECTION_DUPLICATE_MESSAGE)
         return attrs
 
+    @integrity_error_as('unique_collection_product', COLLECTION_DUPLICATE_MESSAGE)
+    @transaction.atomic
     def update(self, instance, validated_data):
-        products = validated_data.get('products_list')
-        all_products = instance.products.all()
-        for item in products:
-            if item['product'] not in all_products:
-                instance.products.add(item['product'])
+        """Состав подборки заменяется переданным: разность множеств по одному values_list """
+
+        products = validated_data.pop('products_list', None)
+        if products is not None:
+            links = ProductCollectionsProducts.objects.filter(collection=instance)
+            wanted = {item['product'].id: item['product'] for item in products}
+            current = set(links.values_list('product_id', flat=True))
+            removed = current - wanted.keys()
+            if removed:
+                links.filter(product_id__in=removed).delete()
+            ProductCollectionsProducts.objects.bulk_create([
+                ProductCollectionsProducts(collection=instance, product=wanted[product_id])
+                for product_id in wanted.keys() - current
+            ])
 
         return super().update(instance, validated_data)
+
+    def to_representation(self, instance):
+        # После записи (и сброса кеша в UpdateModelMixin) товары подгружаются
+        # одним запросом, а не по запросу на каждую позицию
+        if 'products_list' not in getattr(instance, '_prefetched_objects_cache', {}):
+            prefetch_related_objects([instance], Prefetch('products_list', queryset=collection_products_queryset()))
+        return super().to_representation(instance)
+
+
+class StatisticsQuerySerializer(serializers.Serializer):
+    """Параметры запроса статистики продаж """
+
+    date_from = serializers.DateField(required=False)
+    date_to = serializers.DateField(required=False)
+    limit = serializers.IntegerField(min_value=1, max_value=100, default=10)
+    sort = serializers.ChoiceField(choices=('quantity', 'revenue'), default='quantity')
@@ -0,0 +1,50 @@
+from django.conf import settings
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_delete
+from django.dispatch import receiver
+from rest_framework.authtoken.models import Token
+
+from .authentication import invalidate_tokens
+from .caching import bump_catalogue_version
+from .models import Orders, Products
+from .statistics import mark_dirty_day
+
+
+@receiver(post_save, sender=Products)
+@receiver(post_delete, sender=Products)
+def invalidate_catalogue(sender, **kwargs):
+    # Повторный сброс после коммита не даёт закешировать данные,
+    # прочитанные конкурентным запросом до фиксации транзакции
+    bump_catalogue_version()
+    transaction.on_commit(bump_catalogue_version)
+
+
+@receiver(post_save, sender=Token)
+@receiver(post_delete, sender=Token)
+def invalidate_token(sender, instance, **kwargs):
+    invalidate_tokens(instance.key)
+    transaction.on_commit(lambda: invalidate_tokens(instance.key))
+
+
+def invalidate_tokens_of(user):
+    keys = list(Token.objects.filter(user=user).values_list('key', flat=True))
+    invalidate_tokens(*keys)
+    transaction.on_commit(lambda: invalidate_tokens(*keys))
+
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+def invalidate_user_tokens(sender, instance, created, **kwargs):
+    # Снимок пользователя в кеше включает is_active и is_staff
+    if not created:
+        invalidate_tokens_of(instance)
+
+
+@receiver(pre_delete, sender=settings.AUTH_USER_MODEL)
+def invalidate_deleted_user_tokens(sender, instance, **kwargs):
+    # До каскадного удаления, пока токены пользователя ещё можно найти
+    invalidate_tokens_of(instance)
+
+
+@receiver(post_delete, sender=Orders)
+def invalidate_order_statistics(sender, instance, **kwargs):
+    mark_dirty_day(instance.created_at)
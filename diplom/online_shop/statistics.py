@@ -0,0 +1,92 @@
+import datetime
+from functools import reduce
+from operator import or_
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, F, Max, Q, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from .models import (DailySales, Orders, ProductOrder, ProductSalesDaily, StatisticsDirtyDay,
+                     StatisticsState)
+
+
+def created_on_days(days, field='created_at'):
+    """Q по диапазонам [00:00, 00:00 следующего дня) — использует индекс по created_at """
+
+    tz = timezone.get_current_timezone()
+    ranges = []
+    for day in days:
+        start = datetime.datetime.combine(day, datetime.time.min, tzinfo=tz)
+        ranges.append(Q(**{f'{field}__gte': start, f'{field}__lt': start + datetime.timedelta(days=1)}))
+    return reduce(or_, ranges)
+
+
+def mark_dirty_day(created_at):
+    """Помечает день заказа для пересчёта (удаление не меняет updated_at) """
+
+    day = timezone.localdate(created_at)
+    StatisticsDirtyDay.objects.bulk_create([StatisticsDirtyDay(day=day)], ignore_conflicts=True)
+
+
+@transaction.atomic
+def refresh_sales_statistics(full=False):
+    """Обновляет сводные таблицы продаж, возвращает число пересчитанных дней
+
+    Инкрементально пересчитываются только дни, в которых есть заказы с
+    updated_at больше водяного знака, и дни удалённых заказов. День
+    пересчитывается целиком, поэтому повторная обработка безопасна: знак
+    сдвигается с запасом STATISTICS_WATERMARK_LAG секунд, чтобы не
+    пропустить заказы из транзакций, зафиксированных позже чтения.
+    """
+
+    state, _ = StatisticsState.objects.select_for_update().get_or_create(pk=1)
+    started = timezone.now()
+    full = full or state.watermark is None
+    changed = Orders.objects.all() if full else Orders.objects.filter(updated_at__gt=state.watermark)
+    max_updated = changed.aggregate(value=Max('updated_at'))['value']
+    dirty = list(StatisticsDirtyDay.objects.values_list('day', flat=True))
+
+    if full:
+        ProductSalesDaily.objects.all().delete()
+        DailySales.objects.all().delete()
+        orders = Orders.objects.all()
+        positions = ProductOrder.objects.all()
+    else:
+        days = set(changed.order_by().annotate(day=TruncDate('created_at'))
+                   .values_list('day', flat=True).distinct())
+        days.update(dirty)
+        if not days:
+            state.refreshed_at = started
+            state.save(update_fields=['refreshed_at'])
+            return 0
+        ProductSalesDaily.objects.filter(day__in=days).delete()
+        DailySales.objects.filter(day__in=days).delete()
+        orders = Orders.objects.filter(created_on_days(days))
+        positions = ProductOrder.objects.filter(created_on_days(days, 'order__created_at'))
+
+    product_rows = (positions.order_by().annotate(day=TruncDate('order__created_at'))
+                    .values('day', 'product_id')
+                    .annotate(sold=Sum('quantity'),
+                              sold_revenue=Sum(F('quantity') * F('price')),
+                              sold_orders=Count('order_id', distinct=True)))
+    ProductSalesDaily.objects.bulk_create([
+        ProductSalesDaily(day=row['day'], product_id=row['product_id'], quantity=row['sold'],
+                          revenue=row['sold_revenue'], orders_count=row['sold_orders'])
+        for row in product_rows
+    ], batch_size=1000)
+
+    day_rows = (orders.order_by().annotate(day=TruncDate('created_at')).values('day')
+                .annotate(orders_count=Count('id'), revenue=Sum('price_cart')))
+    daily = DailySales.objects.bulk_create([DailySales(**row) for row in day_rows], batch_size=1000)
+
+    StatisticsDirtyDay.objects.filter(day__in=dirty).delete()
+    if max_updated is not None:
+        lag = datetime.timedelta(seconds=getattr(settings, 'STATISTICS_WATERMARK_LAG', 60))
+        watermark = min(max_updated, started - lag)
+        if state.watermark is None or watermark > state.watermark:
+            state.watermark = watermark
+    state.refreshed_at = started
+    state.save(update_fields=['watermark', 'refreshed_at'])
+    return len(daily) if full else len(days)
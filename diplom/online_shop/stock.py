@@ -0,0 +1,56 @@
+from django.db import transaction
+from django.db.models import Case, F, IntegerField, Value, When
+from django.utils import timezone
+from rest_framework import serializers
+
+from .caching import bump_catalogue_version
+from .models import Products
+
+OUT_OF_STOCK_MESSAGE = 'Недостаточно товара на складе'
+
+
+def _per_product(quantities):
+    return Case(
+        *(When(pk=product_id, then=Value(quantity)) for product_id, quantity in quantities.items()),
+        output_field=IntegerField(),
+    )
+
+
+def reserve_stock(quantities):
+    """Списывает остатки {product_id: количество} одним условным UPDATE
+
+    Строка обновляется, только если остатка хватает (stock >= n), поэтому
+    конкурентные заказы не уводят остаток в минус без SELECT FOR UPDATE.
+    Отрицательное количество возвращает товар на склад. Передаются только
+    товары с учётом остатка: stock = NULL означает «без ограничений», и
+    такие строки не трогаются. Вызывать внутри транзакции заказа: при
+    нехватке откатывается вся транзакция. UPDATE идёт мимо сигналов,
+    поэтому updated_at и версия кеша каталога обновляются здесь же.
+    """
+
+    quantities = {product_id: quantity for product_id, quantity in quantities.items() if quantity}
+    if not quantities:
+        return
+    delta = _per_product(quantities)
+    updated = Products.objects.filter(pk__in=quantities, stock__gte=delta).update(
+        stock=F('stock') - delta, updated_at=timezone.now()
+    )
+    if updated != len(quantities):
+        raise serializers.ValidationError({'positions': [OUT_OF_STOCK_MESSAGE]})
+    transaction.on_commit(bump_catalogue_version)
+
+
+def release_stock(quantities):
+    """Возвращает на склад остатки {product_id: количество} одним UPDATE
+
+    Товары без учёта остатка (stock = NULL) не обновляются.
+    """
+
+    quantities = {product_id: quantity for product_id, quantity in quantities.items() if quantity}
+    if not quantities:
+        return
+    updated = Products.objects.filter(pk__in=quantities, stock__isnull=False).update(
+        stock=F('stock') + _per_product(quantities), updated_at=timezone.now()
+    )
+    if updated:
+        transaction.on_commit(bump_catalogue_version)
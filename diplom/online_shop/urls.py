@@ -1,4 +1,6 @@
+from django.urls import path
 from rest_framework.routers import DefaultRouter
+from . import async_views
 from .views import *
 
 
@@ -8,5 +10,15 @@ router.register('product-reviews', ProductReviewsViewSet, 'product-reviews')
 router.register('orders', OrdersViewSet, 'orders')
 router.register('product-collections', ProductCollectionsViewSet, 'product-collections')
 
+async_urlpatterns = [
+    path('async/products/', async_views.product_list, name='async-products-list'),
+    path('async/products/<int:pk>/', async_views.product_detail, name='async-products-detail'),
+    path('async/product-collections/', async_views.collection_list, name='async-product-collections-list'),
+    path('async/product-collections/<int:pk>/', async_views.collection_detail,
+         name='async-product-collections-detail'),
+]
 
-urlpatterns = [] + router.urls
+
+urlpatterns = async_urlpatterns + [
+    path('statistics/', StatisticsView.as_view(), name='statistics'),
+] + router.urls
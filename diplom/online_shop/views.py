@@ -1,74 +1,271 @@
+from django.conf import settings
 from django.core.exceptions import PermissionDenied
+from django.db import transaction
+from django.db.models import Prefetch, Sum
 from django_filters.rest_framework import DjangoFilterBackend
+from rest_framework import serializers, status
+from rest_framework.decorators import action
+from rest_framework.response import Response
+from rest_framework.views import APIView
 from rest_framework.viewsets import ModelViewSet
 from rest_framework.permissions import IsAuthenticated, IsAdminUser
-from .models import Products, Orders, ProductReviews, ProductCollections
-from .serializers import ProductSerializer, ProductReviewsSerializers, OrdersSerializer, ProductCollectionsSerializer
+from .models import OrderStatusChoices, Products, Orders, ProductReviews, ProductCollections, \
+    ProductSalesDaily, DailySales, StatisticsState
+from .serializers import ProductSerializer, ProductReviewsSerializers, OrdersSerializer, ProductCollectionsSerializer, \
+    OrderTransitionSerializer, BulkOrderTransitionSerializer, StatisticsQuerySerializer, collection_products_queryset
 from .filters import *
+from .caching import CatalogueCacheMixin, bump_catalogue_version
+from .conditional import ConditionalGetMixin
+from .export import export_response
 from .permissions import AccessPermission
+from .order_status import transition_orders
+from .ratings import rebuild_product_ratings, update_product_rating
+from .stock import release_stock
 
 
-class ProductsViewSet(ModelViewSet):
+class BulkWriteMixin:
+    """POST/PATCH списком на /bulk/: bulk_create/bulk_update в одной транзакции """
+
+    @action(detail=False, methods=['post', 'patch'])
+    def bulk(self, request):
+        max_size = getattr(settings, 'API_MAX_BULK_SIZE', 1000)
+        if isinstance(request.data, list) and len(request.data) > max_size:
+            raise serializers.ValidationError({'non_field_errors': [f'Не более {max_size} объектов за запрос']})
+        if request.method == 'POST':
+            serializer = self.get_serializer(data=request.data, many=True)
+        else:
+            instances = self.get_bulk_instances(request.data)
+            serializer = self.get_serializer(instances, data=request.data, many=True, partial=True)
+        if not serializer.is_valid():
+            return Response(self.get_bulk_errors(serializer.errors, len(request.data)),
+                            status=status.HTTP_400_BAD_REQUEST)
+        with transaction.atomic():
+            self.perform_bulk_save(serializer)
+        response_status = status.HTTP_201_CREATED if request.method == 'POST' else status.HTTP_200_OK
+        return Response(serializer.data, status=response_status)
+
+    def get_bulk_instances(self, data):
+        """Объекты для PATCH в порядке элементов запроса, одним запросом """
+
+        if not isinstance(data, list):
+            raise serializers.ValidationError({'non_field_errors': ['Ожидался список объектов']})
+        ids = [item.get('id') if isinstance(item, dict) else None for item in data]
+        found = self.get_queryset().in_bulk([pk for pk in ids if isinstance(pk, int)])
+        errors, seen = [], set()
+        for pk in ids:
+            if pk not in found:
+                errors.append({'id': ['Объект не найден']})
+            elif pk in seen:
+                errors.append({'id': ['Объект указан в запросе несколько раз']})
+            else:
+                errors.append({})
+            seen.add(pk)
+        if any(errors):
+            raise serializers.ValidationError(errors)
+        instances = [found[pk] for pk in ids]
+        for instance in instances:
+            self.check_object_permissions(self.request, instance)
+        return instances
+
+    def get_bulk_errors(self, errors, size):
+        """Ошибки по элементам в виде списка той же длины, что и запрос """
+
+        if isinstance(errors, dict) and errors and all(str(key).isdigit() for key in errors):
+            items = [{} for _ in range(size)]
+            for key, detail in errors.items():
+                items[int(key)] = detail
+            return items
+        return errors
+
+    def perform_bulk_save(self, serializer):
+        serializer.save()
+
+
+class ProductsViewSet(CatalogueCacheMixin, ConditionalGetMixin, BulkWriteMixin, ModelViewSet):
     """ViewSet для товаров."""
 
+    replica_reads = True
     serializer_class = ProductSerializer
-    filter_backends = [DjangoFilterBackend]
+    filter_backends = [DjangoFilterBackend, SearchOrderingFilter]
     filterset_class = ProductFilter
+    ordering_fields = ('price', 'rating_avg', 'rating_count', 'created_at',)
+    export_columns = (
+        ('id', 'id'), ('name', 'name'), ('description', 'description'), ('price', 'price'),
+        ('rating_avg', 'rating_avg'), ('rating_count', 'rating_count'),
+        ('created_at', 'created_at'), ('updated_at', 'updated_at'),
+    )
 
     def get_permissions(self):
-        if self.action in ["create", "update", "partial_update", "destroy"]:
+        if self.action in ["create", "update", "partial_update", "destroy", "export", "bulk"]:
             return [IsAuthenticated(), IsAdminUser()]
         return []
 
     def get_queryset(self):
-        return Products.objects.all()
+        return Products.objects.defer('search_vector')
+
+    def perform_bulk_save(self, serializer):
+        serializer.save()
+        bump_catalogue_version()
+
+    @action(detail=False, methods=['get'])
+    def export(self, request):
+        queryset = self.filter_queryset(self.get_queryset()).order_by('id')
+        return export_response(request, queryset, self.export_columns, 'products')
 
 
-class OrdersViewSet(ModelViewSet):
+class OrdersViewSet(ConditionalGetMixin, ModelViewSet):
     """ViewSet для заказов."""
 
     serializer_class = OrdersSerializer
     filter_backends = [DjangoFilterBackend]
     filterset_class = OrdersFilter
+    export_columns = (
+        ('order_id', 'id'), ('user_id', 'user_id'), ('status', 'status'), ('price_cart', 'price_cart'),
+        ('created_at', 'created_at'), ('updated_at', 'updated_at'),
+        ('product_id', 'positions__product_id'), ('quantity', 'positions__quantity'),
+    )
 
     def get_queryset(self):
+        queryset = Orders.objects.prefetch_related('positions')
+        if self.action in ('list', 'retrieve'):
+            queryset = queryset.prefetch_related('cart')
         if self.request.user.is_staff:
-            return Orders.objects.prefetch_related('positions').all()
-        return Orders.objects.prefetch_related('positions').filter(user=self.request.user)
+            return queryset.all()
+        return queryset.filter(user=self.request.user)
 
     def get_permissions(self):
         if self.action in ["create", "update", "partial_update", "destroy", ]:
             return [IsAuthenticated(), AccessPermission()]
+        if self.action == "export":
+            return [IsAuthenticated()]
+        if self.action in ["transition", "bulk_transition"]:
+            return [IsAuthenticated(), IsAdminUser()]
         return []
 
+    @action(detail=True, methods=['post'])
+    def transition(self, request, pk=None):
+        """Смена статуса заказа по ORDER_STATUS_TRANSITIONS """
+
+        order = self.get_object()
+        serializer = OrderTransitionSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        transition_orders([order.id], serializer.validated_data['status'], request.user)
+        return Response({'id': order.id, 'status': serializer.validated_data['status']})
+
+    @action(detail=False, methods=['post'], url_path='transition', url_name='bulk-transition')
+    def bulk_transition(self, request):
+        """Смена статуса пачки заказов одним UPDATE """
 
-class ProductReviewsViewSet(ModelViewSet):
+        serializer = BulkOrderTransitionSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        ids = transition_orders(serializer.validated_data['ids'], serializer.validated_data['status'], request.user)
+        return Response({'ids': ids, 'status': serializer.validated_data['status']})
+
+    @transaction.atomic
+    def perform_destroy(self, instance):
+        # Отмена незавершённого заказа возвращает товар на склад
+        if instance.status != OrderStatusChoices.DONE:
+            release_stock({item.product_id: item.quantity for item in instance.positions.all()})
+        instance.delete()
+
+    @action(detail=False, methods=['get'])
+    def export(self, request):
+        queryset = self.filter_queryset(self.get_queryset()).order_by('id', 'positions__id')
+        return export_response(request, queryset, self.export_columns, 'orders')
+
+
+class ProductReviewsViewSet(ConditionalGetMixin, BulkWriteMixin, ModelViewSet):
     """ViewSet для отзывов."""
 
+    replica_reads = True
     serializer_class = ProductReviewsSerializers
     filter_backends = [DjangoFilterBackend]
     filterset_class = ProductReviewsFilter
 
     def get_queryset(self):
-        return ProductReviews.objects.all()
+        return ProductReviews.objects.select_related('user')
 
     def get_permissions(self):
-        if self.action in ["create", "update", "partial_update", "destroy"]:
+        if self.action in ["create", "update", "partial_update", "destroy", "bulk"]:
             return [IsAuthenticated(), AccessPermission()]
         return []
 
+    def perform_bulk_save(self, serializer):
+        reviews = serializer.save()
+        product_ids = {review.product_id_id for review in reviews}
+        rebuild_product_ratings(Products.objects.filter(pk__in=product_ids))
+
+    @transaction.atomic
+    def perform_create(self, serializer):
+        review = serializer.save()
+        update_product_rating(review.product_id_id, review.rate, 1)
+
+    @transaction.atomic
+    def perform_update(self, serializer):
+        old_rate = serializer.instance.rate
+        review = serializer.save()
+        update_product_rating(review.product_id_id, review.rate - old_rate, 0)
 
-class ProductCollectionsViewSet(ModelViewSet):
+    @transaction.atomic
+    def perform_destroy(self, instance):
+        update_product_rating(instance.product_id_id, -instance.rate, -1)
+        instance.delete()
+
+
+class ProductCollectionsViewSet(ConditionalGetMixin, ModelViewSet):
     """ViewSet для подборок."""
 
+    replica_reads = True
     serializer_class = ProductCollectionsSerializer
     filter_backends = [DjangoFilterBackend]
+    conditional_related = ('products__updated_at',)
 
     def get_queryset(self):
-        return ProductCollections.objects.all()
+        return ProductCollections.objects.select_related('user').prefetch_related(
+            Prefetch('products_list', queryset=collection_products_queryset())
+        )
 
     def get_permissions(self):
         if self.action in ["create", "update", "partial_update", "destroy"]:
             return [IsAuthenticated(), IsAdminUser()]
         return []
 
+
+class StatisticsView(APIView):
+    """Статистика продаж из сводных таблиц (refresh_statistics)."""
+
+    permission_classes = [IsAuthenticated, IsAdminUser]
+
+    def get(self, request):
+        params = StatisticsQuerySerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+        period = {}
+        if 'date_from' in params.validated_data:
+            period['day__gte'] = params.validated_data['date_from']
+        if 'date_to' in params.validated_data:
+            period['day__lte'] = params.validated_data['date_to']
+
+        sort = params.validated_data['sort']
+        products = (ProductSalesDaily.objects.filter(**period)
+                    .values('product_id', 'product__name')
+                    .annotate(quantity=Sum('quantity'), revenue=Sum('revenue'))
+                    .order_by(f'-{sort}', 'product_id')[:params.validated_data['limit']])
+        days = list(DailySales.objects.filter(**period).order_by('day').values('day', 'orders_count', 'revenue'))
+        orders_count = sum(day['orders_count'] for day in days)
+        revenue = sum(day['revenue'] for day in days)
+        for day in days:
+            day['average_order_value'] = round(day['revenue'] / day['orders_count'], 2)
+        state = StatisticsState.objects.filter(pk=1).values_list('refreshed_at', flat=True).first()
+
+        return Response({
+            'refreshed_at': state,
+            'orders_count': orders_count,
+            'revenue': revenue,
+            'average_order_value': round(revenue / orders_count, 2) if orders_count else 0,
+            'products': [
+                {'product': item['product_id'], 'name': item['product__name'],
+                 'quantity': item['quantity'], 'revenue': item['revenue']}
+                for item in products
+            ],
+            'days': days,
+        })
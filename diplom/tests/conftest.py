@@ -1,10 +1,60 @@
+import os
 import pytest
 import random
+import time
+from contextlib import contextmanager
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from rest_framework.authtoken.models import Token
 from rest_framework.test import APIClient
 from model_bakery import baker
 
 
+# Результаты perf_budget для сводной таблицы в конце прогона
+PERF_RESULTS = []
+
+# Множитель бюджетов по времени для медленных CI-машин
+PERF_TIME_FACTOR = float(os.environ.get('PERF_TIME_FACTOR', 1))
+
+
+def pytest_terminal_summary(terminalreporter):
+    if not PERF_RESULTS:
+        return
+    terminalreporter.section('API performance budgets')
+    terminalreporter.write_line(f'{"endpoint":<40} {"queries":>12} {"time, ms":>18}  status')
+    for label, queries, max_queries, elapsed, max_seconds in PERF_RESULTS:
+        ok = queries <= max_queries and elapsed <= max_seconds
+        terminalreporter.write_line(
+            f'{label:<40} {f"{queries}/{max_queries}":>12} '
+            f'{f"{elapsed * 1000:.1f}/{max_seconds * 1000:.0f}":>18}  {"ok" if ok else "OVER"}'
+        )
+
+
+@pytest.fixture
+def perf_budget():
+    """Проверка бюджета запросов к БД и времени выполнения блока"""
+
+    @contextmanager
+    def measure(label, max_queries, max_seconds):
+        max_seconds *= PERF_TIME_FACTOR
+        with CaptureQueriesContext(connection) as queries:
+            start = time.perf_counter()
+            yield queries
+            elapsed = time.perf_counter() - start
+        PERF_RESULTS.append((label, len(queries), max_queries, elapsed, max_seconds))
+
+        assert len(queries) <= max_queries, f'{label}: {len(queries)} запросов, бюджет {max_queries}'
+        assert elapsed <= max_seconds, f'{label}: {elapsed:.3f} с, бюджет {max_seconds:.3f} с'
+
+    return measure
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    cache.clear()
+
+
 @pytest.fixture
 def api_client():
     return APIClient()
@@ -34,32 +84,32 @@ def auth_api_client(user):
 
 @pytest.fixture
 def products_factory():
-    def func(**kwargs):
-        return baker.make("Products", _quantity=20, price=random.randint(1, 10000), **kwargs)
+    def func(_quantity=20, **kwargs):
+        return baker.make("Products", _quantity=_quantity, price=random.randint(1, 10000), **kwargs)
 
     return func
 
 
 @pytest.fixture
 def product_reviews_factory(user, products_factory):
-    def func(**kwargs):
-        return baker.make("ProductReviews", user=user, _quantity=5, **kwargs)
+    def func(_quantity=5, **kwargs):
+        return baker.make("ProductReviews", user=user, _quantity=_quantity, **kwargs)
 
     return func
 
 
 @pytest.fixture
 def orders_factory(user):
-    def func(**kwargs):
-        return baker.make("Orders", _quantity=8, **kwargs, make_m2m=False, user=user)
+    def func(_quantity=8, **kwargs):
+        return baker.make("Orders", _quantity=_quantity, **kwargs, make_m2m=False, user=user)
 
     return func
 
 
 @pytest.fixture
 def product_collections_factory(user):
-    def func(**kwargs):
-        return baker.make("ProductCollections", make_m2m=False, _quantity=3, user=user, **kwargs)
+    def func(_quantity=3, **kwargs):
+        return baker.make("ProductCollections", make_m2m=False, _quantity=_quantity, user=user, **kwargs)
 
     return func
 
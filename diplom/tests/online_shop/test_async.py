@@ -0,0 +1,119 @@
+import pytest
+from asgiref.sync import async_to_sync
+from django.test import AsyncClient
+from django.urls import reverse
+import rest_framework.status as status
+from model_bakery import baker
+
+from online_shop.models import ProductCollectionsProducts
+
+
+@pytest.mark.django_db
+def test_async_product_list_matches_sync(api_client, products_factory):
+    """ Async-список товаров отдаёт те же данные, что и ViewSet"""
+    products_factory(_quantity=5)
+    sync_resp = api_client.get(reverse("products-list"))
+    async_resp = api_client.get(reverse("async-products-list"))
+
+    assert async_resp.status_code == status.HTTP_200_OK
+    assert async_resp.json()["results"] == sync_resp.json()["results"]
+
+
+@pytest.mark.django_db
+def test_async_product_list_cursor(api_client, products_factory):
+    """ Keyset-пагинация async-списка проходит все товары без повторов"""
+    products = products_factory(_quantity=7)
+    url = reverse("async-products-list") + "?page_size=3"
+    ids = []
+    while url:
+        resp_json = api_client.get(url).json()
+        ids += [item["id"] for item in resp_json["results"]]
+        url = resp_json["next"]
+
+    assert ids == sorted(product.id for product in products)
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("params", [{"search": "Велосипед"}, {"ordering": "-price"}, {"ordering": "rating_avg"}])
+def test_async_product_list_ordering_matches_sync(api_client, products_factory, params):
+    """ ?search= и ?ordering= сортируют async-список так же, как ViewSet, на всех страницах"""
+    products_factory(_quantity=5)
+    baker.make("Products", _quantity=4, name="Велосипед горный", description="рама", price=100)
+    baker.make("Products", _quantity=3, name="Велосипед детский", description="рама", price=300)
+
+    def walk(url):
+        results = []
+        data = {**params, "page_size": 3}
+        while url and len(results) < 30:
+            resp_json = api_client.get(url, data=data).json()
+            results += resp_json["results"]
+            url, data = resp_json["next"], None
+        return results
+
+    sync_results = walk(reverse("products-list"))
+
+    assert walk(reverse("async-products-list")) == sync_results
+    assert len(sync_results) == (7 if "search" in params else 12)
+
+
+@pytest.mark.django_db
+def test_async_product_list_filter(api_client):
+    """ Фильтры ProductFilter работают в async-списке"""
+    baker.make("Products", _quantity=3, price=100)
+    baker.make("Products", _quantity=2, price=500)
+    resp = api_client.get(reverse("async-products-list"), {"price_min": 200})
+
+    assert resp.status_code == status.HTTP_200_OK
+    assert len(resp.json()["results"]) == 2
+
+
+@pytest.mark.django_db
+def test_async_product_detail(api_client, products_factory):
+    """ Получение товара по id и 404 для несуществующего"""
+    product = products_factory(_quantity=1)[0]
+    resp = api_client.get(reverse("async-products-detail", args=[product.id]))
+    missing = api_client.get(reverse("async-products-detail", args=[product.id + 1]))
+
+    assert resp.status_code == status.HTTP_200_OK
+    assert resp.json()["name"] == product.name
+    assert missing.status_code == status.HTTP_404_NOT_FOUND
+
+
+@pytest.mark.django_db
+def test_async_invalid_cursor(api_client):
+    """ Битый курсор даёт 400"""
+    resp = api_client.get(reverse("async-products-list"), {"cursor": "broken"})
+
+    assert resp.status_code == status.HTTP_400_BAD_REQUEST
+
+
+@pytest.mark.django_db
+def test_async_collections(api_client, product_collections_factory, products_factory):
+    """ Async-подборки совпадают с ViewSet и укладываются в 2 запроса через ASGI"""
+    collections = product_collections_factory()
+    for collection in collections:
+        for product in products_factory(_quantity=4):
+            baker.make(ProductCollectionsProducts, collection=collection, product=product)
+    sync_resp = api_client.get(reverse("product-collections-list"))
+    detail = api_client.get(reverse("async-product-collections-detail", args=[collections[0].id]))
+
+    async_resp = async_to_sync(AsyncClient().get)(reverse("async-product-collections-list"))
+
+    assert async_resp.status_code == status.HTTP_200_OK
+    assert async_resp.json()["results"] == sync_resp.json()["results"]
+    assert 'desc="2 queries"' in async_resp["Server-Timing"]
+    assert len(detail.json()["products"]) == 4
+
+
+@pytest.mark.django_db
+def test_async_product_cache_invalidation(api_client, admin_api_client, products_factory):
+    """ Async-товары идут через кеш каталога и сбрасываются при изменении товара"""
+    product = products_factory(_quantity=1)[0]
+    url = reverse("async-products-detail", args=[product.id])
+    first = api_client.get(url)
+    second = api_client.get(url)
+    admin_api_client.patch(reverse("products-detail", args=[product.id]), data={"name": "новое имя"})
+    third = api_client.get(url)
+
+    assert (first["X-Cache"], second["X-Cache"], third["X-Cache"]) == ("MISS", "HIT", "MISS")
+    assert third.json()["name"] == "новое имя"
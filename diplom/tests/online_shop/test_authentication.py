@@ -0,0 +1,87 @@
+import pytest
+from django.core.cache import cache
+from django.db.models.signals import post_delete
+from django.urls import reverse
+import rest_framework.status as status
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from online_shop.authentication import token_cache_key
+from online_shop.signals import invalidate_token
+
+
+@pytest.mark.django_db
+def test_cached_token_saves_query(auth_api_client, orders_factory, django_assert_num_queries):
+    """ Повторный запрос с тем же токеном делает на один запрос меньше"""
+    orders_factory()
+    url = reverse("orders-list")
+    with django_assert_num_queries(4):
+        first = auth_api_client.get(url)
+    with django_assert_num_queries(3):
+        second = auth_api_client.get(url)
+
+    assert first.status_code == second.status_code == status.HTTP_200_OK
+
+
+@pytest.mark.django_db
+def test_token_delete_invalidates(auth_api_client, user):
+    """ Удалённый токен перестаёт работать сразу"""
+    url = reverse("orders-list")
+    auth_api_client.get(url)
+    Token.objects.filter(user=user).delete()
+    resp = auth_api_client.get(url)
+
+    assert resp.status_code == status.HTTP_401_UNAUTHORIZED
+
+
+@pytest.mark.django_db
+def test_token_rotation_invalidates(auth_api_client, user):
+    """ После ротации токена старый не принимается, новый работает"""
+    url = reverse("orders-list")
+    auth_api_client.get(url)
+    Token.objects.filter(user=user).delete()
+    new_token = Token.objects.create(user=user)
+    client = APIClient()
+    client.credentials(HTTP_AUTHORIZATION=f'Token {new_token}')
+
+    assert auth_api_client.get(url).status_code == status.HTTP_401_UNAUTHORIZED
+    assert client.get(url).status_code == status.HTTP_200_OK
+
+
+@pytest.mark.django_db
+def test_user_deactivation_invalidates(auth_api_client, user):
+    """ Деактивированный пользователь не проходит аутентификацию из кеша"""
+    url = reverse("orders-list")
+    auth_api_client.get(url)
+    user.is_active = False
+    user.save()
+    resp = auth_api_client.get(url)
+
+    assert resp.status_code == status.HTTP_401_UNAUTHORIZED
+
+
+@pytest.mark.django_db
+def test_cached_snapshot_without_password(auth_api_client, user):
+    """ В кеше только id и флаги пользователя, без хеша пароля"""
+    auth_api_client.get(reverse("orders-list"))
+    token = Token.objects.get(user=user)
+
+    assert cache.get(token_cache_key(token.key)) == {
+        "id": user.id, "is_active": True, "is_staff": False, "is_superuser": False,
+    }
+
+
+@pytest.mark.django_db
+def test_user_delete_invalidates(auth_api_client, user):
+    """ Удаление пользователя сбрасывает кеш его токенов и без сигналов токена"""
+    url = reverse("orders-list")
+    auth_api_client.get(url)
+    key = Token.objects.get(user=user).key
+    post_delete.disconnect(invalidate_token, sender=Token)
+    try:
+        user.delete()
+    finally:
+        post_delete.connect(invalidate_token, sender=Token)
+
+    assert cache.get(token_cache_key(key)) is None
+    assert auth_api_client.get(url).status_code == status.HTTP_401_UNAUTHORIZED
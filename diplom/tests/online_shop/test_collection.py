@@ -2,6 +2,9 @@ import pytest
 import random
 from django.urls import reverse
 import rest_framework.status as status
+from model_bakery import baker
+
+from online_shop.models import ProductCollectionsProducts
 
 
 @pytest.mark.django_db
@@ -22,7 +25,7 @@ def test_get_all_collection(auth_api_client, product_collections_factory):
     product_collections_factory()
     url = reverse("product-collections-list")
     resp = auth_api_client.get(url)
-    resp_json = resp.json()
+    resp_json = resp.json()["results"]
 
     assert resp.status_code == status.HTTP_200_OK
     assert len(resp_json) == 3
@@ -73,3 +76,101 @@ def test_delete_collection_user(auth_api_client, product_collections_factory):
     assert resp.status_code == status.HTTP_403_FORBIDDEN
 
 
+@pytest.mark.django_db
+@pytest.mark.parametrize("products_count", [1, 30])
+def test_list_collection_num_queries(auth_api_client, product_collections_factory,
+                                     django_assert_num_queries, products_count):
+    """ Число запросов списка подборок не зависит от числа товаров"""
+    collections = product_collections_factory()
+    products = baker.make("Products", price=10, _quantity=products_count, _bulk_create=True)
+    ProductCollectionsProducts.objects.bulk_create([
+        ProductCollectionsProducts(collection=collection, product=product)
+        for collection in collections for product in products
+    ])
+    url = reverse("product-collections-list")
+
+    with django_assert_num_queries(3):
+        resp = auth_api_client.get(url)
+    resp_json = resp.json()["results"]
+
+    assert resp.status_code == status.HTTP_200_OK
+    assert [len(item["products"]) for item in resp_json] == [products_count] * 3
+    assert resp_json[0]["products"][0] == {
+        "product": products[0].id, "name": products[0].name, "price": products[0].price,
+    }
+
+
+@pytest.mark.django_db
+def test_collection_conditional_get(auth_api_client, product_collections_factory):
+    """ ETag подборки меняется после её изменения"""
+    collection = product_collections_factory()[0]
+    url = reverse("product-collections-detail", args=[collection.id])
+    etag = auth_api_client.get(url)["ETag"]
+
+    not_modified = auth_api_client.get(url, HTTP_IF_NONE_MATCH=etag)
+    collection.text = "новое описание"
+    collection.save()
+    modified = auth_api_client.get(url, HTTP_IF_NONE_MATCH=etag)
+
+    assert not_modified.status_code == status.HTTP_304_NOT_MODIFIED
+    assert modified.status_code == status.HTTP_200_OK
+
+
+@pytest.mark.django_db
+def test_collection_conditional_get_products(auth_api_client, product_collections_factory, products_factory):
+    """ ETag подборки учитывает изменения входящих в неё товаров"""
+    collection = product_collections_factory()[0]
+    product = products_factory()[0]
+    ProductCollectionsProducts.objects.create(collection=collection, product=product)
+    url = reverse("product-collections-detail", args=[collection.id])
+    etag = auth_api_client.get(url)["ETag"]
+
+    not_modified = auth_api_client.get(url, HTTP_IF_NONE_MATCH=etag)
+    product.price += 1
+    product.save()
+    modified = auth_api_client.get(url, HTTP_IF_NONE_MATCH=etag)
+
+    assert not_modified.status_code == status.HTTP_304_NOT_MODIFIED
+    assert modified.status_code == status.HTTP_200_OK
+    assert modified.json()["products"][0]["price"] == product.price
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("products_count", [1, 300])
+def test_create_collection_num_queries(admin_api_client, django_assert_num_queries, products_count):
+    """ Создание подборки связывает товары за фиксированное число запросов"""
+    products = baker.make("Products", price=10, _quantity=products_count, _bulk_create=True)
+    url = reverse("product-collections-list")
+    data = {"name": "подборка", "text": "текст", "products": [{"product": product.id} for product in products]}
+
+    with django_assert_num_queries(7):
+        resp = admin_api_client.post(url, data=data, format="json")
+
+    assert resp.status_code == status.HTTP_201_CREATED
+    assert len(resp.json()["products"]) == products_count
+    assert ProductCollectionsProducts.objects.filter(collection_id=resp.json()["id"]).count() == products_count
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("products_count", [2, 300])
+def test_update_collection_products(admin_api_client, product_collections_factory,
+                                    django_assert_num_queries, products_count):
+    """ Обновление заменяет состав подборки: одна вставка и одно удаление"""
+    collection = product_collections_factory(_quantity=1)[0]
+    products = baker.make("Products", price=10, _quantity=products_count * 2, _bulk_create=True)
+    kept, removed, added = (products[:products_count // 2], products[products_count // 2:products_count],
+                            products[products_count:])
+    ProductCollectionsProducts.objects.bulk_create([
+        ProductCollectionsProducts(collection=collection, product=product) for product in kept + removed
+    ])
+    url = reverse("product-collections-detail", args=[collection.id])
+    data = {"products": [{"product": product.id} for product in kept + added]}
+
+    with django_assert_num_queries(11):
+        resp = admin_api_client.patch(url, data=data, format="json")
+
+    assert resp.status_code == status.HTTP_200_OK
+    assert sorted(item["product"] for item in resp.json()["products"]) == \
+        sorted(product.id for product in kept + added)
+    assert set(collection.products_list.values_list("product_id", flat=True)) == \
+        {product.id for product in kept + added}
@@ -0,0 +1,32 @@
+import pytest
+from django.core.exceptions import ImproperlyConfigured
+
+from diplom.database import connection_settings
+
+
+def test_persistent_connections_by_default():
+    """ По умолчанию соединения постоянные и проверяются перед использованием"""
+    assert connection_settings({}) == {'CONN_MAX_AGE': 60, 'CONN_HEALTH_CHECKS': True, 'OPTIONS': {}}
+    assert connection_settings({'DB_CONN_MAX_AGE': '0'})['CONN_MAX_AGE'] == 0
+
+
+def test_psycopg_pool_mode():
+    """ Режим пула psycopg отключает CONN_MAX_AGE и задаёт размер пула"""
+    settings = connection_settings({'DB_POOL_MODE': 'psycopg', 'DB_POOL_MAX_SIZE': '20'})
+
+    assert settings['CONN_MAX_AGE'] == 0
+    assert settings['OPTIONS']['pool'] == {'min_size': 2, 'max_size': 20, 'timeout': 10.0}
+
+
+def test_pgbouncer_mode():
+    """ За pgbouncer соединения с ним остаются постоянными"""
+    settings = connection_settings({'DB_POOL_MODE': 'pgbouncer'})
+
+    assert settings['CONN_MAX_AGE'] == 60
+    assert 'pool' not in settings['OPTIONS']
+
+
+def test_unknown_pool_mode():
+    """ Неизвестный режим — ошибка конфигурации"""
+    with pytest.raises(ImproperlyConfigured):
+        connection_settings({'DB_POOL_MODE': 'pgpool'})
@@ -0,0 +1,60 @@
+import csv
+import io
+import json
+
+import pytest
+import rest_framework.status as status
+from django.urls import reverse
+
+from online_shop.models import ProductOrder
+
+
+def read_stream(resp):
+    return b"".join(resp.streaming_content).decode()
+
+
+@pytest.mark.django_db
+def test_export_orders_ndjson(auth_api_client, orders_factory, products_factory):
+    """ Выгрузка заказов в NDJSON с развёрнутыми позициями"""
+    orders = orders_factory()
+    products = products_factory()
+    ProductOrder.objects.bulk_create([
+        ProductOrder(order=orders[0], product=product, quantity=2, price=product.price) for product in products[:3]
+    ])
+    url = reverse("orders-export")
+    resp = auth_api_client.get(url)
+    rows = [json.loads(line) for line in read_stream(resp).splitlines()]
+
+    assert resp.status_code == status.HTTP_200_OK
+    assert resp["Content-Type"] == "application/x-ndjson"
+    assert len(rows) == 3 + len(orders) - 1
+    assert [row["product_id"] for row in rows[:3]] == [product.id for product in products[:3]]
+    assert rows[0]["order_id"] == orders[0].id and rows[0]["quantity"] == 2
+
+
+@pytest.mark.django_db
+def test_export_products_csv_filtered(admin_api_client, products_factory):
+    """ Выгрузка товаров в CSV с учётом фильтров"""
+    products = products_factory()
+    url = reverse("products-export")
+    resp = admin_api_client.get(url, data={"export_format": "csv", "name": products[0].name})
+    rows = list(csv.DictReader(io.StringIO(read_stream(resp))))
+
+    assert resp.status_code == status.HTTP_200_OK
+    assert [int(row["id"]) for row in rows] == [products[0].id]
+    assert rows[0]["created_at"] == products[0].created_at.isoformat()
+
+
+@pytest.mark.django_db
+def test_export_permissions(api_client, auth_api_client):
+    """ Выгрузка недоступна без авторизации, товары — только администратору"""
+    assert api_client.get(reverse("orders-export")).status_code == status.HTTP_401_UNAUTHORIZED
+    assert auth_api_client.get(reverse("products-export")).status_code == status.HTTP_403_FORBIDDEN
+
+
+@pytest.mark.django_db
+def test_export_unknown_format(auth_api_client):
+    """ Неизвестный формат выгрузки"""
+    resp = auth_api_client.get(reverse("orders-export"), data={"export_format": "xml"})
+
+    assert resp.status_code == status.HTTP_400_BAD_REQUEST
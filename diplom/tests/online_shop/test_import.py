@@ -0,0 +1,79 @@
+import io
+import json
+
+import pytest
+from django.core.management import call_command
+from django.urls import reverse
+
+from online_shop.models import Products
+
+
+def run_import(path, *args):
+    stdout, stderr = io.StringIO(), io.StringIO()
+    call_command("import_products", str(path), *args, stdout=stdout, stderr=stderr)
+    return stdout.getvalue(), stderr.getvalue()
+
+
+@pytest.mark.django_db
+def test_import_products_csv_upsert(tmp_path):
+    """ Импорт CSV добавляет новые товары и обновляет существующие по артикулу"""
+    Products.objects.create(supplier_sku="A-1", name="старое имя", price=1)
+    path = tmp_path / "catalogue.csv"
+    path.write_text(
+        "supplier_sku,name,description,price\n"
+        "A-1,Велосипед,горный,15000\n"
+        "A-2,Шлем,,2500\n"
+        "A-2,Шлем,взрослый,2600\n",
+        encoding="utf-8",
+    )
+    stdout, stderr = run_import(path, "--batch-size", "2")
+
+    assert stderr == ""
+    assert "добавлено: 1, обновлено: 2" in stdout
+    assert dict(Products.objects.values_list("supplier_sku", "price")) == {"A-1": 15000, "A-2": 2600}
+    assert Products.objects.get(supplier_sku="A-2").description == "взрослый"
+
+
+@pytest.mark.django_db
+def test_import_products_errors_and_dry_run(tmp_path):
+    """ Ошибки по строкам и режим dry-run"""
+    path = tmp_path / "catalogue.ndjson"
+    path.write_text(
+        json.dumps({"supplier_sku": "B-1", "name": "Насос", "price": 300}) + "\n"
+        + json.dumps({"supplier_sku": "B-2", "name": "Фляга", "price": -5}) + "\n"
+        + json.dumps({"name": "Без артикула", "price": 10}) + "\n"
+        + "{broken\n",
+        encoding="utf-8",
+    )
+    errors_path = tmp_path / "errors.ndjson"
+    stdout, _ = run_import(path, "--dry-run", "--errors", str(errors_path))
+    errors = [json.loads(line) for line in errors_path.read_text(encoding="utf-8").splitlines()]
+
+    assert stdout.startswith("[dry-run] Строк: 4, ошибок: 3")
+    assert [error["line"] for error in errors] == [2, 3, 4]
+    assert "price" in errors[0]["errors"]
+    assert "supplier_sku" in errors[1]["errors"]
+    assert not Products.objects.exists()
+
+    run_import(path, "--errors", str(errors_path))
+    assert list(Products.objects.values_list("supplier_sku", flat=True)) == ["B-1"]
+
+
+@pytest.mark.django_db
+def test_import_products_cursor(tmp_path, api_client):
+    """ Товары одной пачки импорта проходятся курсором без пропусков и повторов"""
+    path = tmp_path / "catalogue.ndjson"
+    path.write_text(
+        "".join(json.dumps({"supplier_sku": f"C-{i}", "name": f"Товар {i}", "price": 100}) + "\n"
+                for i in range(30)),
+        encoding="utf-8",
+    )
+    run_import(path, "--batch-size", "30")
+    url = reverse("products-list")
+    ids = []
+    while url and len(ids) < 60:
+        page = api_client.get(url, data={"page_size": 7} if not ids else None).json()
+        ids += [item["id"] for item in page["results"]]
+        url = page["next"]
+
+    assert ids == sorted(Products.objects.values_list("id", flat=True))
@@ -0,0 +1,72 @@
+import pytest
+from django.db import connection
+
+from online_shop.filters import OrdersFilter, ProductFilter, ProductReviewsFilter
+from online_shop.models import Orders, OrderStatusChoices, ProductReviews, Products
+
+
+def assert_uses_index(queryset, index_name):
+    if connection.vendor == "postgresql":
+        # На маленьких тестовых таблицах планировщик иначе выберет seq scan
+        with connection.cursor() as cursor:
+            cursor.execute("SET LOCAL enable_seqscan = off")
+    plan = queryset.explain()
+
+    assert index_name in plan, plan
+
+
+@pytest.mark.django_db
+def test_user_orders_index(user):
+    """ Список заказов пользователя по (user_id, created_at)"""
+    assert_uses_index(Orders.objects.filter(user=user).order_by("created_at", "id"), "orders_user_created_idx")
+
+
+@pytest.mark.django_db
+def test_status_orders_index():
+    """ Фильтр заказов по статусу"""
+    qs = OrdersFilter(data={"status": OrderStatusChoices.DONE}, queryset=Orders.objects.all()).qs
+    assert_uses_index(qs.order_by("created_at", "id"), "orders_status_created_idx")
+
+
+@pytest.mark.django_db
+def test_open_orders_partial_index():
+    """ Незавершённые заказы читаются по частичному индексу"""
+    qs = OrdersFilter(data={"is_open": True}, queryset=Orders.objects.all()).qs
+    assert_uses_index(qs.order_by("created_at", "id"), "orders_open_created_idx")
+
+
+@pytest.mark.django_db
+def test_orders_created_at_index():
+    """ Фильтр заказов по дате создания"""
+    qs = OrdersFilter(data={"created_at_after": "2021-07-01", "created_at_before": "2021-07-31"},
+                      queryset=Orders.objects.all()).qs
+    assert_uses_index(qs, "orders_created_id_idx")
+
+
+@pytest.mark.django_db
+def test_orders_updated_at_index():
+    """ Фильтр заказов по дате обновления"""
+    qs = OrdersFilter(data={"updated_at_after": "2021-07-01"}, queryset=Orders.objects.all()).qs
+    assert_uses_index(qs, "orders_updated_idx")
+
+
+@pytest.mark.django_db
+def test_orders_price_cart_index():
+    """ Фильтр заказов по сумме"""
+    qs = OrdersFilter(data={"price_cart": 1000}, queryset=Orders.objects.all()).qs
+    assert_uses_index(qs, "orders_price_cart_idx")
+
+
+@pytest.mark.django_db
+def test_products_price_index():
+    """ Диапазон цен товаров"""
+    qs = ProductFilter(data={"price_min": 100, "price_max": 200}, queryset=Products.objects.all()).qs
+    assert_uses_index(qs, "products_price_idx")
+
+
+@pytest.mark.django_db
+def test_reviews_product_index():
+    """ Отзывы к товару по дате"""
+    qs = ProductReviewsFilter(data={"product_id": 1, "created_at_after": "2021-07-01"},
+                              queryset=ProductReviews.objects.all()).qs
+    assert_uses_index(qs.order_by("created_at", "id"), "reviews_product_created_idx")
@@ -0,0 +1,62 @@
+import json
+import logging
+
+import pytest
+from django.db import connection
+from django.urls import reverse
+
+from online_shop.middleware import QueryRecorder
+
+
+@pytest.mark.django_db
+def test_server_timing_header(auth_api_client, orders_factory, caplog):
+    """ Server-Timing и структурированный лог для запроса"""
+    orders_factory()
+    url = reverse("orders-list")
+    with caplog.at_level(logging.INFO, logger="online_shop.db"):
+        resp = auth_api_client.get(url)
+    record = json.loads(caplog.records[-1].getMessage())
+
+    assert resp["Server-Timing"].startswith("db;dur=")
+    assert f'desc="{record["queries"]} queries"' in resp["Server-Timing"]
+    assert record["view"] == "OrdersViewSet.list"
+    assert record["queries"] > 0
+    assert "sql" not in record
+
+
+@pytest.mark.django_db
+def test_slow_request_logs_sql(api_client, products_factory, caplog, settings):
+    """ Для медленного запроса в лог попадает полный SQL"""
+    settings.DB_SLOW_REQUEST_MS = 0
+    products_factory()
+    url = reverse("products-list")
+    with caplog.at_level(logging.INFO, logger="online_shop.db"):
+        api_client.get(url)
+    log = caplog.records[-1]
+    record = json.loads(log.getMessage())
+
+    assert log.levelno == logging.WARNING
+    assert len(record["sql"]) == record["queries"]
+    assert "online_shop_products" in record["sql"][-1]["sql"]
+
+
+@pytest.mark.django_db
+def test_instrumentation_sampling(api_client, settings):
+    """ При нулевой доле выборки статистика не собирается"""
+    settings.DB_INSTRUMENTATION_SAMPLE_RATE = 0
+    resp = api_client.get(reverse("products-list"))
+
+    assert "Server-Timing" not in resp
+
+
+@pytest.mark.django_db
+def test_query_recorder_duplicates():
+    """ Повторяющиеся шаблоны запросов попадают в duplicates"""
+    recorder = QueryRecorder()
+    with connection.execute_wrapper(recorder), connection.cursor() as cursor:
+        for value in range(3):
+            cursor.execute("SELECT %s", [value])
+        cursor.execute("SELECT 1")
+
+    assert recorder.count == 4
+    assert list(recorder.duplicates().values()) == [3]
@@ -2,6 +2,12 @@ import pytest
 import random
 from django.urls import reverse
 import rest_framework.status as status
+from django.db import IntegrityError, transaction
+from model_bakery import baker
+from rest_framework.exceptions import ValidationError
+
+from online_shop.models import Orders, ProductOrder, Products
+from online_shop.serializers import ORDER_DUPLICATE_MESSAGE, integrity_error_as
 
 
 @pytest.mark.django_db
@@ -23,7 +29,7 @@ def test_get_all_order(auth_api_client, orders_factory):
     orders_factory()
     url = reverse("orders-list")
     resp = auth_api_client.get(url)
-    resp_json = resp.json()
+    resp_json = resp.json()["results"]
 
     assert resp.status_code == status.HTTP_200_OK
     assert len(resp_json) == 8
@@ -53,7 +59,7 @@ def test_price_order(auth_api_client, orders_factory):
     price_cart = random.choice(orders).price_cart
     url = reverse("orders-list")
     resp = auth_api_client.get(url, data={"price_min": price_cart, "price_max": price_cart})
-    resp_json = resp.json()
+    resp_json = resp.json()["results"]
 
     assert resp.status_code == status.HTTP_200_OK
     # assert resp_json[0]["price_cart"] == price_cart
@@ -66,7 +72,7 @@ def test_date_create_order(auth_api_client, orders_factory):
     created_at = random.choice(orders).created_at
     url = reverse("orders-list")
     resp = auth_api_client.get(url, data={"created_at": created_at}, format="json")
-    resp_json = resp.json()
+    resp_json = resp.json()["results"]
 
     assert resp.status_code == status.HTTP_200_OK
     assert resp_json[0]["created_at"] > str(created_at)
@@ -79,7 +85,7 @@ def test_date_update_order(auth_api_client, orders_factory):
     updated_at = random.choice(orders).updated_at
     url = reverse("orders-list")
     resp = auth_api_client.get(url, data={"updated_at": updated_at}, format="json")
-    resp_json = resp.json()
+    resp_json = resp.json()["results"]
 
     assert resp.status_code == status.HTTP_200_OK
     assert resp_json[0]["updated_at"] > str(updated_at)
@@ -92,7 +98,7 @@ def test_product_order(auth_api_client, orders_factory, products_factory):
     product_id = random.choice(products_factory()).id
     url = reverse("orders-list")
     resp = auth_api_client.get(url, data={"positions": [{"product_id": product_id, "quantity": 1}]}, format="json")
-    resp_json = resp.json()
+    resp_json = resp.json()["results"]
 
     assert resp.status_code == status.HTTP_200_OK
     assert resp_json[0]["id"] == orders[0].id
@@ -139,7 +145,111 @@ def test_update_status_order_admin(admin_api_client, orders_factory):
     """ Проверка обновления заказа админом"""
     order = orders_factory()[0]
     url = reverse("orders-detail", args=[order.id])
-    resp = admin_api_client.patch(url, data={"status":"DONE"}, format="json")
+    resp = admin_api_client.patch(url, data={"status":"IN_PROGRESS"}, format="json")
+
+    assert resp.status_code == status.HTTP_200_OK
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("positions_count", [1, 200])
+def test_create_order_num_queries(auth_api_client, django_assert_num_queries, positions_count):
+    """ Количество запросов при создании заказа не зависит от числа позиций"""
+    products = baker.make("Products", price=10, _quantity=positions_count, _bulk_create=True)
+    positions = [{"product": product.id, "quantity": 2} for product in products]
+    url = reverse("orders-list")
+
+    with django_assert_num_queries(8):
+        resp = auth_api_client.post(url, data={"positions": positions}, format="json")
+
+    assert resp.status_code == status.HTTP_201_CREATED
+    assert Orders.objects.count() == 1
+    assert ProductOrder.objects.filter(order_id=resp.json()["id"]).count() == positions_count
+    assert Orders.objects.get().price_cart == 20 * positions_count
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("positions_count", [1, 100])
+def test_update_order_positions_num_queries(admin_api_client, django_assert_num_queries, positions_count):
+    """ Обновление позиций заказа фиксированным числом запросов"""
+    products = baker.make("Products", price=10, _quantity=positions_count * 2, _bulk_create=True)
+    order = baker.make("Orders", price_cart=0, make_m2m=False)
+    ProductOrder.objects.bulk_create([
+        ProductOrder(order=order, product=product, quantity=1, price=product.price)
+        for product in products[:positions_count]
+    ])
+    positions = [{"product": product.id, "quantity": 3} for product in products]
+    url = reverse("orders-detail", args=[order.id])
+
+    with django_assert_num_queries(13):
+        resp = admin_api_client.patch(url, data={"positions": positions}, format="json")
 
+    order.refresh_from_db()
     assert resp.status_code == status.HTTP_200_OK
+    assert order.positions.count() == positions_count * 2
+    assert order.price_cart == 30 * positions_count * 2
 
+
+@pytest.mark.django_db
+def test_order_conditional_get(admin_api_client, orders_factory, django_assert_num_queries):
+    """ ETag заказа: 304 без сериализации и 200 после изменения"""
+    order = orders_factory()[0]
+    url = reverse("orders-detail", args=[order.id])
+    resp = admin_api_client.get(url)
+    etag = resp["ETag"]
+
+    with django_assert_num_queries(1):
+        not_modified = admin_api_client.get(url, HTTP_IF_NONE_MATCH=etag)
+    assert not_modified.status_code == status.HTTP_304_NOT_MODIFIED
+
+    since = admin_api_client.get(url, HTTP_IF_MODIFIED_SINCE=resp["Last-Modified"])
+    assert since.status_code == status.HTTP_304_NOT_MODIFIED
+
+    admin_api_client.patch(url, data={"status": "IN_PROGRESS"}, format="json")
+    modified = admin_api_client.get(url, HTTP_IF_NONE_MATCH=etag)
+    assert modified.status_code == status.HTTP_200_OK
+    assert modified["ETag"] != etag
+
+
+@pytest.mark.django_db
+def test_order_list_conditional_get(auth_api_client, orders_factory, user):
+    """ ETag списка заказов меняется при появлении нового заказа"""
+    orders_factory()
+    url = reverse("orders-list")
+    etag = auth_api_client.get(url)["ETag"]
+
+    not_modified = auth_api_client.get(url, HTTP_IF_NONE_MATCH=etag)
+    baker.make("Orders", make_m2m=False, user=user)
+    modified = auth_api_client.get(url, HTTP_IF_NONE_MATCH=etag)
+
+    assert not_modified.status_code == status.HTTP_304_NOT_MODIFIED
+    assert modified.status_code == status.HTTP_200_OK
+    assert len(modified.json()["results"]) == 9
+
+
+@pytest.mark.django_db
+def test_duplicate_position_constraint(orders_factory, products_factory):
+    """ Позиция заказа уникальна для пары заказ-товар на уровне БД"""
+    order = orders_factory()[0]
+    product = products_factory()[0]
+    ProductOrder.objects.create(order=order, product=product, quantity=1, price=product.price)
+
+    with pytest.raises(IntegrityError), transaction.atomic():
+        ProductOrder.objects.create(order=order, product=product, quantity=2, price=product.price)
+
+
+@pytest.mark.django_db
+def test_integrity_error_as_only_named_constraint(orders_factory, products_factory):
+    """ В ошибку «дубликат» превращается только нарушение указанного ограничения"""
+    order = orders_factory()[0]
+    product = products_factory()[0]
+    ProductOrder.objects.create(order=order, product=product, quantity=1, price=product.price)
+
+    with pytest.raises(ValidationError), transaction.atomic():
+        with integrity_error_as('unique_order_product', ORDER_DUPLICATE_MESSAGE):
+            ProductOrder.objects.create(order=order, product=product, quantity=2, price=product.price)
+    with pytest.raises(IntegrityError), transaction.atomic():
+        with integrity_error_as('unique_order_product', ORDER_DUPLICATE_MESSAGE):
+            Products.objects.filter(pk=product.pk).update(price=-1)
+    with pytest.raises(IntegrityError), transaction.atomic():
+        with integrity_error_as('unique_review_user_product', ORDER_DUPLICATE_MESSAGE):
+            ProductOrder.objects.create(order=order, product=product, quantity=2, price=product.price)
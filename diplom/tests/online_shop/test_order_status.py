@@ -0,0 +1,89 @@
+import pytest
+from django.urls import reverse
+import rest_framework.status as status
+
+from online_shop.models import Orders, OrderStatusChoices, OrderStatusTransition
+
+
+@pytest.mark.django_db
+def test_status_values_normalized():
+    """ Значения статусов без хвостовых пробелов"""
+    assert [choice.value for choice in OrderStatusChoices] == ["NEW", "IN_PROGRESS", "DONE"]
+
+
+@pytest.mark.django_db
+def test_patch_skipping_status_rejected(admin_api_client, orders_factory):
+    """ Переход NEW -> DONE через PATCH запрещён"""
+    order = orders_factory(_quantity=1)[0]
+    resp = admin_api_client.patch(reverse("orders-detail", args=[order.id]), data={"status": "DONE"}, format="json")
+    order.refresh_from_db()
+
+    assert resp.status_code == status.HTTP_400_BAD_REQUEST
+    assert order.status == OrderStatusChoices.NEW
+
+
+@pytest.mark.django_db
+def test_create_ignores_status(auth_api_client, products_factory):
+    """ Заказ всегда создаётся в статусе NEW, даже если в запросе указан другой"""
+    product = products_factory(_quantity=1)[0]
+    resp = auth_api_client.post(reverse("orders-list"),
+                                data={"status": "DONE", "positions": [{"product": product.id, "quantity": 1}]},
+                                format="json")
+
+    assert resp.status_code == status.HTTP_201_CREATED
+    assert resp.json()["status"] == OrderStatusChoices.NEW
+    assert Orders.objects.get(pk=resp.json()["id"]).status == OrderStatusChoices.NEW
+
+
+@pytest.mark.django_db
+def test_transition_order(admin_api_client, orders_factory):
+    """ Смена статуса одного заказа записывается в историю"""
+    order = orders_factory(_quantity=1)[0]
+    url = reverse("orders-transition", args=[order.id])
+    resp = admin_api_client.post(url, data={"status": "IN_PROGRESS"}, format="json")
+    order.refresh_from_db()
+
+    assert resp.status_code == status.HTTP_200_OK
+    assert order.status == OrderStatusChoices.IN_PROGRESS
+    assert list(order.transitions.values_list("from_status", "to_status")) == [("NEW", "IN_PROGRESS")]
+
+
+@pytest.mark.django_db
+def test_transition_forbidden_for_user(auth_api_client, orders_factory):
+    """ Менять статус может только персонал"""
+    order = orders_factory(_quantity=1)[0]
+    resp = auth_api_client.post(reverse("orders-transition", args=[order.id]), data={"status": "IN_PROGRESS"},
+                                format="json")
+
+    assert resp.status_code == status.HTTP_403_FORBIDDEN
+
+
+@pytest.mark.django_db
+def test_bulk_transition(admin_api_client, orders_factory, django_assert_num_queries):
+    """ Пачка заказов переводится одним UPDATE и одной вставкой истории"""
+    orders = orders_factory(_quantity=150)
+    ids = [order.id for order in orders]
+    url = reverse("orders-bulk-transition")
+
+    # аутентификация, SELECT FOR UPDATE, UPDATE, вставка истории и пара SAVEPOINT
+    with django_assert_num_queries(6):
+        resp = admin_api_client.post(url, data={"ids": ids, "status": "IN_PROGRESS"}, format="json")
+
+    assert resp.status_code == status.HTTP_200_OK
+    assert Orders.objects.filter(status=OrderStatusChoices.IN_PROGRESS).count() == 150
+    assert OrderStatusTransition.objects.filter(to_status="IN_PROGRESS").count() == 150
+
+
+@pytest.mark.django_db
+def test_bulk_transition_rejects_invalid(admin_api_client, orders_factory):
+    """ Один недопустимый переход отклоняет всю пачку"""
+    orders = orders_factory(_quantity=3)
+    done = orders_factory(_quantity=1, status=OrderStatusChoices.DONE)[0]
+    ids = [order.id for order in orders] + [done.id]
+    resp = admin_api_client.post(reverse("orders-bulk-transition"), data={"ids": ids, "status": "IN_PROGRESS"},
+                                 format="json")
+
+    assert resp.status_code == status.HTTP_400_BAD_REQUEST
+    assert str(done.id) in resp.json()["ids"][0]
+    assert Orders.objects.filter(status=OrderStatusChoices.NEW).count() == 3
+    assert not OrderStatusTransition.objects.exists()
@@ -0,0 +1,131 @@
+import itertools
+
+import pytest
+import rest_framework.status as status
+from django.urls import reverse
+from model_bakery import baker
+
+from online_shop.models import ProductCollectionsProducts, ProductOrder
+
+PRODUCTS_COUNT = 2000
+ORDERS_COUNT = 1000
+POSITIONS_PER_ORDER = 3
+
+
+@pytest.fixture
+def catalogue(products_factory):
+    return products_factory(_quantity=PRODUCTS_COUNT, _bulk_create=True)
+
+
+@pytest.fixture
+def order_history(orders_factory, catalogue):
+    orders = orders_factory(_quantity=ORDERS_COUNT, _bulk_create=True)
+    ProductOrder.objects.bulk_create([
+        ProductOrder(order=order, product=catalogue[(index + shift) % PRODUCTS_COUNT], quantity=1, price=1)
+        for index, order in enumerate(orders)
+        for shift in range(POSITIONS_PER_ORDER)
+    ])
+    return orders
+
+
+@pytest.mark.django_db
+def test_products_list_budget(api_client, catalogue, perf_budget):
+    """ Бюджет списка товаров"""
+    url = reverse("products-list")
+    with perf_budget("GET products-list", max_queries=1, max_seconds=0.5):
+        resp = api_client.get(url, data={"page_size": 100})
+
+    assert resp.status_code == status.HTTP_200_OK
+    assert len(resp.json()["results"]) == 100
+
+
+@pytest.mark.django_db
+def test_products_detail_budget(api_client, catalogue, perf_budget):
+    """ Бюджет получения товара"""
+    url = reverse("products-detail", args=[catalogue[-1].id])
+    with perf_budget("GET products-detail", max_queries=2, max_seconds=0.2):
+        resp = api_client.get(url)
+
+    assert resp.status_code == status.HTTP_200_OK
+
+
+@pytest.mark.django_db
+def test_products_search_budget(api_client, catalogue, perf_budget):
+    """ Бюджет поиска товаров"""
+    url = reverse("products-list")
+    with perf_budget("GET products-list?search", max_queries=1, max_seconds=0.5):
+        resp = api_client.get(url, data={"search": catalogue[0].name[:5]})
+
+    assert resp.status_code == status.HTTP_200_OK
+
+
+@pytest.mark.django_db
+def test_reviews_list_budget(api_client, product_reviews_factory, catalogue, perf_budget):
+    """ Бюджет списка отзывов"""
+    product_reviews_factory(_quantity=PRODUCTS_COUNT, product_id=iter(catalogue), _bulk_create=True)
+    url = reverse("product-reviews-list")
+    with perf_budget("GET product-reviews-list", max_queries=1, max_seconds=0.5):
+        resp = api_client.get(url, data={"page_size": 100})
+
+    assert resp.status_code == status.HTTP_200_OK
+    assert len(resp.json()["results"]) == 100
+
+
+@pytest.mark.django_db
+def test_orders_list_budget(admin_api_client, order_history, perf_budget):
+    """ Бюджет списка заказов для администратора"""
+    url = reverse("orders-list")
+    with perf_budget("GET orders-list (staff)", max_queries=4, max_seconds=0.5):
+        resp = admin_api_client.get(url, data={"page_size": 100})
+
+    assert resp.status_code == status.HTTP_200_OK
+    assert [len(item["positions"]) for item in resp.json()["results"]] == [POSITIONS_PER_ORDER] * 100
+
+
+@pytest.mark.django_db
+def test_orders_detail_budget(auth_api_client, order_history, perf_budget):
+    """ Бюджет получения заказа"""
+    url = reverse("orders-detail", args=[order_history[-1].id])
+    with perf_budget("GET orders-detail", max_queries=5, max_seconds=0.2):
+        resp = auth_api_client.get(url)
+
+    assert resp.status_code == status.HTTP_200_OK
+
+
+@pytest.mark.django_db
+def test_orders_create_budget(auth_api_client, catalogue, perf_budget):
+    """ Бюджет создания заказа на 200 позиций"""
+    positions = [{"product": product.id, "quantity": 1} for product in catalogue[:200]]
+    url = reverse("orders-list")
+    with perf_budget("POST orders-list (200 positions)", max_queries=8, max_seconds=0.5):
+        resp = auth_api_client.post(url, data={"positions": positions}, format="json")
+
+    assert resp.status_code == status.HTTP_201_CREATED
+
+
+@pytest.mark.django_db
+def test_orders_update_budget(admin_api_client, order_history, catalogue, perf_budget):
+    """ Бюджет обновления позиций заказа"""
+    order = order_history[0]
+    positions = [{"product": product.id, "quantity": 2} for product in catalogue[:200]]
+    url = reverse("orders-detail", args=[order.id])
+    with perf_budget("PATCH orders-detail (200 positions)", max_queries=13, max_seconds=0.5):
+        resp = admin_api_client.patch(url, data={"positions": positions}, format="json")
+
+    assert resp.status_code == status.HTTP_200_OK
+
+
+@pytest.mark.django_db
+def test_collections_list_budget(auth_api_client, product_collections_factory, catalogue, perf_budget):
+    """ Бюджет списка подборок"""
+    collections = product_collections_factory(_quantity=50)
+    ProductCollectionsProducts.objects.bulk_create([
+        ProductCollectionsProducts(collection=collection, product=product)
+        for collection, product in zip(itertools.cycle(collections), catalogue)
+    ])
+    url = reverse("product-collections-list")
+    with perf_budget("GET product-collections-list", max_queries=3, max_seconds=0.5):
+        resp = auth_api_client.get(url)
+
+    assert resp.status_code == status.HTTP_200_OK
+    assert sum(len(item["products"]) for item in resp.json()["results"]) == PRODUCTS_COUNT
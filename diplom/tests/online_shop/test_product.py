@@ -1,7 +1,12 @@
 import pytest
 import random
+from django.db import connection
 from django.urls import reverse
 import rest_framework.status as status
+from model_bakery import baker
+
+from online_shop.caching import get_catalogue_cache_stats
+from online_shop.models import Products
 
 
 @pytest.mark.django_db
@@ -23,7 +28,7 @@ def test_list_product(api_client, products_factory):
     products_factory()
     url = reverse("products-list")
     resp = api_client.get(url)
-    resp_json = resp.json()
+    resp_json = resp.json()["results"]
 
     assert resp.status_code == status.HTTP_200_OK
     assert len(resp_json) == 20
@@ -36,7 +41,7 @@ def test_name_product(api_client, products_factory):
     name = random.choice(products).name
     url = reverse("products-list")
     resp = api_client.get(url, data={"name": name})
-    resp_json = resp.json()
+    resp_json = resp.json()["results"]
 
     assert resp.status_code == status.HTTP_200_OK
     assert resp_json[0]["name"] == name
@@ -49,7 +54,7 @@ def test_description_product(api_client, products_factory):
     description = random.choice(products).description
     url = reverse("products-list")
     resp = api_client.get(url, data={"description": description})
-    resp_json = resp.json()
+    resp_json = resp.json()["results"]
 
     assert resp.status_code == status.HTTP_200_OK
     assert resp_json[0]["description"] == description
@@ -62,7 +67,7 @@ def test_price_product(api_client, products_factory):
     price = random.choice(products).price
     url = reverse("products-list")
     resp = api_client.get(url, data={"price_min": price, "price_max": price})
-    resp_json = resp.json()
+    resp_json = resp.json()["results"]
 
     assert resp.status_code == status.HTTP_200_OK
     assert resp_json[0]["price"] == price
@@ -90,3 +95,226 @@ def test_create_product_user(auth_api_client, products_factory):
                                            "price": 300}, format="json")
 
     assert resp.status_code == status.HTTP_403_FORBIDDEN
+
+
+@pytest.mark.django_db
+def test_list_product_cursor(api_client, products_factory):
+    """ Постраничное получение списка товаров по курсору"""
+    products_factory()
+    url = reverse("products-list")
+    resp = api_client.get(url, data={"page_size": 15})
+    first_page = resp.json()
+    resp = api_client.get(first_page["next"])
+    second_page = resp.json()
+    ids = [item["id"] for item in first_page["results"] + second_page["results"]]
+
+    assert resp.status_code == status.HTTP_200_OK
+    assert len(first_page["results"]) == 15
+    assert len(ids) == len(set(ids)) == 20
+    assert second_page["next"] is None
+
+
+@pytest.mark.django_db
+def test_list_product_cursor_same_created_at(api_client):
+    """ Курсор проходит больше offset_cutoff товаров с одинаковым created_at"""
+    products = baker.make("Products", _quantity=1200, _bulk_create=True)
+    Products.objects.update(created_at=products[0].created_at)
+    url = reverse("products-list")
+    ids, pages = [], 0
+    while url and pages < 20:
+        page = api_client.get(url, data={"page_size": 100} if pages == 0 else None).json()
+        ids += [item["id"] for item in page["results"]]
+        url, pages = page["next"], pages + 1
+
+    assert pages == 12
+    assert sorted(ids) == sorted(product.id for product in products)
+    previous = api_client.get(page["previous"]).json()
+    assert [item["id"] for item in previous["results"]] == ids[-200:-100]
+
+
+@pytest.mark.django_db
+def test_list_product_page_size_cap(api_client, products_factory, settings):
+    """ Ограничение размера страницы"""
+    settings.API_MAX_PAGE_SIZE = 7
+    products_factory()
+    url = reverse("products-list")
+    resp = api_client.get(url, data={"page_size": 1000})
+
+    assert resp.status_code == status.HTTP_200_OK
+    assert len(resp.json()["results"]) == 7
+
+
+@pytest.mark.django_db
+def test_ordering_product_ties(api_client, products_factory):
+    """ Курсор по ?ordering= с одинаковыми значениями не теряет и не повторяет товары"""
+    products = products_factory()
+    url = reverse("products-list")
+    ids = []
+    while url and len(ids) < 60:
+        page = api_client.get(url, data={"ordering": "-rating_avg", "page_size": 7} if not ids else None).json()
+        ids += [item["id"] for item in page["results"]]
+        url = page["next"]
+
+    assert ids == sorted(product.id for product in products)
+
+
+@pytest.mark.django_db
+def test_rating_filter_and_ordering_product(api_client, products_factory):
+    """ Фильтрация и сортировка по рейтингу"""
+    products = products_factory()
+    for rate, product in enumerate(products[:5], start=1):
+        product.rating_avg = rate
+        product.rating_count = 1
+        product.save()
+    url = reverse("products-list")
+    resp = api_client.get(url, data={"rating_avg_min": 2, "ordering": "-rating_avg"})
+    resp_json = resp.json()["results"]
+
+    assert resp.status_code == status.HTTP_200_OK
+    assert [item["rating_avg"] for item in resp_json] == [5, 4, 3, 2]
+
+
+@pytest.mark.django_db
+def test_product_cache(api_client, admin_api_client, products_factory):
+    """ Кеширование каталога и сброс после изменения товара"""
+    product = products_factory()[0]
+    url = reverse("products-detail", args=[product.id])
+
+    first = api_client.get(url)
+    second = api_client.get(url)
+    stats = get_catalogue_cache_stats()
+
+    assert (first["X-Cache"], second["X-Cache"]) == ("MISS", "HIT")
+    assert stats == {"hits": 1, "misses": 1}
+
+    resp = admin_api_client.patch(url, data={"price": 1}, format="json")
+    after_write = api_client.get(url)
+
+    assert resp.status_code == status.HTTP_200_OK
+    assert after_write["X-Cache"] == "MISS"
+    assert after_write.json()["price"] == 1
+
+
+@pytest.mark.django_db
+def test_product_list_cache_key(api_client, products_factory):
+    """ Ключ кеша списка не зависит от порядка параметров"""
+    products_factory()
+    url = reverse("products-list")
+
+    first = api_client.get(f"{url}?price_min=1&page_size=5")
+    second = api_client.get(f"{url}?page_size=5&price_min=1")
+    other = api_client.get(f"{url}?page_size=6&price_min=1")
+
+    assert (first["X-Cache"], second["X-Cache"], other["X-Cache"]) == ("MISS", "HIT", "MISS")
+    assert first.json() == second.json()
+
+
+@pytest.mark.django_db
+def test_product_conditional_get_from_cache(api_client, products_factory, django_assert_num_queries):
+    """ 304 для товара из кеша без обращения к БД"""
+    product = products_factory()[0]
+    url = reverse("products-detail", args=[product.id])
+    etag = api_client.get(url)["ETag"]
+
+    with django_assert_num_queries(0):
+        resp = api_client.get(url, HTTP_IF_NONE_MATCH=etag)
+
+    assert resp.status_code == status.HTTP_304_NOT_MODIFIED
+
+
+@pytest.mark.django_db
+def test_search_product(api_client, products_factory):
+    """ Поиск товаров по ?search="""
+    products_factory()
+    baker.make("Products", name="Велосипед горный", description="алюминиевая рама", price=100)
+    url = reverse("products-list")
+    resp = api_client.get(url, data={"search": "Велосипед"})
+    resp_json = resp.json()["results"]
+
+    assert resp.status_code == status.HTTP_200_OK
+    assert [item["name"] for item in resp_json] == ["Велосипед горный"]
+
+
+@pytest.mark.django_db
+def test_search_product_cursor(api_client, products_factory):
+    """ Курсор по результатам поиска с одинаковой релевантностью"""
+    products_factory()
+    products = baker.make("Products", _quantity=25, name="Велосипед горный", description="рама", price=100)
+    url = reverse("products-list")
+    ids = []
+    while url and len(ids) < 50:
+        page = api_client.get(url, data={"search": "Велосипед", "page_size": 10} if not ids else None).json()
+        ids += [item["id"] for item in page["results"]]
+        url = page["next"]
+
+    assert ids == sorted(product.id for product in products)
+
+
+@pytest.mark.django_db
+@pytest.mark.skipif(connection.vendor != "postgresql", reason="полнотекстовый поиск только в PostgreSQL")
+def test_search_product_ranking_and_typo(api_client):
+    """ Ранжирование и устойчивость к опечаткам в поиске"""
+    baker.make("Products", name="Рама", description="подходит для велосипеда", price=100)
+    baker.make("Products", name="Велосипед горный", description="алюминиевая рама", price=100)
+    url = reverse("products-list")
+
+    ranked = api_client.get(url, data={"search": "велосипед"}).json()["results"]
+    typo = api_client.get(url, data={"search": "велосипдеы горный"}).json()["results"]
+
+    assert [item["name"] for item in ranked] == ["Велосипед горный", "Рама"]
+    assert typo[0]["name"] == "Велосипед горный"
+
+
+@pytest.mark.django_db
+def test_bulk_create_update_product_admin(admin_api_client, auth_api_client):
+    """ Массовое создание и изменение товаров"""
+    url = reverse("products-bulk")
+    data = [{"name": f"товар {index}", "description": "описание", "price": 100 + index} for index in range(3)]
+
+    assert auth_api_client.post(url, data=data, format="json").status_code == status.HTTP_403_FORBIDDEN
+
+    resp = admin_api_client.post(url, data=data, format="json")
+    created = resp.json()
+    assert resp.status_code == status.HTTP_201_CREATED
+    assert [item["name"] for item in created] == ["товар 0", "товар 1", "товар 2"]
+
+    resp = admin_api_client.patch(url, data=[{"id": item["id"], "price": 1} for item in created], format="json")
+    assert resp.status_code == status.HTTP_200_OK
+    assert [item["price"] for item in resp.json()] == [1, 1, 1]
+    assert set(Products.objects.values_list("price", flat=True)) == {1}
+
+
+@pytest.mark.django_db
+def test_bulk_product_per_item_errors(admin_api_client, products_factory):
+    """ Ошибки массовых операций возвращаются по каждому элементу"""
+    product = products_factory()[0]
+    url = reverse("products-bulk")
+
+    resp = admin_api_client.post(url, data=[{"name": "ok", "price": 1}, {"name": "без цены"}], format="json")
+    assert resp.status_code == status.HTTP_400_BAD_REQUEST
+    assert resp.json()[0] == {} and "price" in resp.json()[1]
+
+    resp = admin_api_client.patch(url, data=[{"id": product.id, "price": 5}, {"id": 0, "price": 5}], format="json")
+    assert resp.status_code == status.HTTP_400_BAD_REQUEST
+    assert resp.json() == [{}, {"id": ["Объект не найден"]}]
+    assert not Products.objects.filter(name="ok").exists()
+
+
+@pytest.mark.django_db
+def test_bulk_product_limits(admin_api_client, products_factory, settings):
+    """ Массовые операции ограничены API_MAX_BULK_SIZE и не принимают один id дважды"""
+    settings.API_MAX_BULK_SIZE = 2
+    product = products_factory()[0]
+    price = product.price
+    url = reverse("products-bulk")
+
+    resp = admin_api_client.post(url, data=[{"name": "товар", "price": 1}] * 3, format="json")
+    assert resp.status_code == status.HTTP_400_BAD_REQUEST
+    assert not Products.objects.filter(name="товар").exists()
+
+    resp = admin_api_client.patch(url, data=[{"id": product.id, "price": 5}, {"id": product.id, "price": 6}],
+                                  format="json")
+    product.refresh_from_db()
+    assert resp.status_code == status.HTTP_400_BAD_REQUEST
+    assert resp.json() == [{}, {"id": ["Объект указан в запросе несколько раз"]}]
+    assert product.price == price
@@ -0,0 +1,83 @@
+import datetime
+import io
+import json
+import uuid
+from decimal import Decimal
+
+import pytest
+from django.urls import reverse
+from django.utils import timezone
+import rest_framework.status as status
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+
+from online_shop import parsers, renderers
+from online_shop.parsers import FastJSONParser
+from online_shop.renderers import FastJSONRenderer
+
+orjson = pytest.importorskip('orjson')
+
+PAYLOAD = {
+    'created_at': timezone.make_aware(datetime.datetime(2024, 5, 1, 12, 30, 15, 123456), datetime.timezone.utc),
+    'day': datetime.date(2024, 5, 1),
+    'price': Decimal('199.90'),
+    'uuid': uuid.UUID('12345678-1234-5678-1234-567812345678'),
+    'name': 'Товар ',
+    'positions': [{'product': 1, 'quantity': 2}],
+    1: 'нестроковый ключ',
+}
+
+
+def test_renders_like_json_renderer():
+    """ orjson даёт тот же JSON, что и стандартный рендерер: datetime, date, Decimal, UUID"""
+    fast = FastJSONRenderer().render(PAYLOAD)
+
+    assert json.loads(fast) == json.loads(JSONRenderer().render(PAYLOAD))
+    assert json.loads(fast)['created_at'] == '2024-05-01T12:30:15.123456Z'
+    assert b'\\u2028' in fast
+
+
+def test_renderer_fallback_without_orjson(monkeypatch):
+    """ Без orjson рендерер и парсер работают через стандартный json"""
+    monkeypatch.setattr(renderers, 'orjson', None)
+    monkeypatch.setattr(parsers, 'orjson', None)
+    content = FastJSONRenderer().render(PAYLOAD)
+
+    assert content == JSONRenderer().render(PAYLOAD)
+    assert FastJSONParser().parse(io.BytesIO(content)) == JSONParser().parse(io.BytesIO(content))
+
+
+def test_renderer_indent_uses_json_renderer():
+    """ Запрошенный отступ обрабатывает стандартный рендерер"""
+    media_type = 'application/json; indent=4'
+
+    assert (FastJSONRenderer().render(PAYLOAD, media_type)
+            == JSONRenderer().render(PAYLOAD, media_type))
+
+
+def test_parser():
+    """ Парсер разбирает JSON и отклоняет битый ввод и NaN"""
+    parser = FastJSONParser()
+
+    assert parser.parse(io.BytesIO('{"name": "Товар", "price": 1.5}'.encode())) == {'name': 'Товар', 'price': 1.5}
+    for body in (b'{"name": ', b'{"price": NaN}'):
+        with pytest.raises(ParseError):
+            parser.parse(io.BytesIO(body))
+
+
+@pytest.mark.django_db
+def test_api_uses_fast_renderer(auth_api_client, orders_factory, products_factory):
+    """ API отдаёт и принимает JSON через FastJSONRenderer/FastJSONParser"""
+    orders_factory(_quantity=1)
+    product = products_factory(_quantity=1)[0]
+    resp = auth_api_client.get(reverse("orders-list"))
+
+    assert resp.status_code == status.HTTP_200_OK
+    assert isinstance(resp.accepted_renderer, FastJSONRenderer)
+    assert resp.json()['results'][0]['created_at'].endswith('Z')
+
+    payload = {'positions': [{'product': product.id, 'quantity': 1}]}
+    resp = auth_api_client.post(reverse("orders-list"), payload, format='json')
+
+    assert resp.status_code == status.HTTP_201_CREATED
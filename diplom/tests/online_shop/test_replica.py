@@ -0,0 +1,129 @@
+import pytest
+from django.core.cache import cache
+from django.db import connections
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+import rest_framework.status as status
+from model_bakery import baker
+
+from online_shop.caching import CATALOGUE_CHANGED_KEY
+from online_shop.models import ProductReviews, Products
+from online_shop.routers import ReplicaRouter, replica_reads
+
+# 'replica' в тестах — зеркало default (TEST MIRROR): данные общие, а с какой
+# БД прочитан ответ, видно по запросам на соединении реплики. Зеркало видит
+# только зафиксированные данные, поэтому тесты без общей транзакции
+DATABASES = ["default", "replica"]
+
+
+@pytest.fixture
+def replica(settings):
+    settings.DATABASE_REPLICA_ALIAS = "replica"
+    settings.REPLICA_PIN_SECONDS = 5
+    return "replica"
+
+
+def replica_queries(client, url):
+    """ Ответ и число запросов, ушедших на реплику"""
+    with CaptureQueriesContext(connections["replica"]) as queries:
+        resp = client.get(url)
+    return resp, len(queries)
+
+
+@pytest.mark.django_db(transaction=True, databases=DATABASES)
+def test_catalogue_reads_from_replica(api_client, replica):
+    """ Список товаров читается с реплики"""
+    baker.make("Products", _quantity=3)
+    # Окно после изменения каталога прошло
+    cache.delete(CATALOGUE_CHANGED_KEY)
+    resp, queries = replica_queries(api_client, reverse("products-list"))
+
+    assert resp.status_code == status.HTTP_200_OK
+    assert len(resp.json()["results"]) == 3
+    assert queries > 0
+
+
+@pytest.mark.django_db(transaction=True, databases=DATABASES)
+def test_catalogue_cache_filled_from_primary_after_change(admin_api_client, api_client, replica):
+    """ Сразу после изменения цены кеш каталога заполняется с основной БД, а не с отстающей реплики"""
+    product = baker.make("Products", price=100)
+    url = reverse("products-detail", args=[product.id])
+
+    resp = admin_api_client.patch(url, data={"price": 200}, format="json")
+    assert resp.status_code == status.HTTP_200_OK
+    first, queries = replica_queries(api_client, url)
+    cache.delete(CATALOGUE_CHANGED_KEY)
+    cached = api_client.get(url)
+
+    assert queries == 0
+    assert first.json()["price"] == 200
+    assert cached["X-Cache"] == "HIT"
+
+
+@pytest.mark.django_db(transaction=True, databases=DATABASES)
+def test_orders_read_from_primary(auth_api_client, orders_factory, replica):
+    """ Заказы не входят в ViewSet'ы с replica_reads и читаются с default"""
+    orders_factory(_quantity=2)
+    resp, queries = replica_queries(auth_api_client, reverse("orders-list"))
+
+    assert len(resp.json()["results"]) == 2
+    assert queries == 0
+
+
+@pytest.mark.django_db(transaction=True, databases=DATABASES)
+def test_client_pinned_after_write(auth_api_client, api_client, user, replica):
+    """ После записи клиент читает свои отзывы с основной БД, остальные — с реплики"""
+    product = baker.make("Products")
+    url = reverse("product-reviews-list")
+
+    resp = auth_api_client.post(url, data={"product_id": product.id, "text": "отлично", "rate": 5}, format="json")
+    assert resp.status_code == status.HTTP_201_CREATED
+
+    own, own_queries = replica_queries(auth_api_client, url)
+    other, other_queries = replica_queries(api_client, url)
+
+    assert [item["id"] for item in own.json()["results"]] == [resp.json()["id"]]
+    assert own_queries == 0
+    assert other_queries > 0
+
+
+@pytest.mark.django_db(transaction=True, databases=DATABASES)
+def test_pin_by_token_without_cookie(auth_api_client, user, replica):
+    """ Закрепление по токену работает и для клиента без cookie"""
+    product = baker.make("Products")
+    url = reverse("product-reviews-list")
+    auth_api_client.post(url, data={"product_id": product.id, "text": "хорошо", "rate": 4}, format="json")
+    auth_api_client.cookies.clear()
+    resp, queries = replica_queries(auth_api_client, url)
+
+    assert len(resp.json()["results"]) == 1
+    assert queries == 0
+
+
+@pytest.mark.django_db(transaction=True, databases=DATABASES)
+def test_pin_expires(auth_api_client, user, replica, settings):
+    """ По истечении окна клиент снова читает с реплики"""
+    settings.REPLICA_PIN_SECONDS = 0
+    product = baker.make("Products")
+    url = reverse("product-reviews-list")
+    auth_api_client.post(url, data={"product_id": product.id, "text": "хорошо", "rate": 4}, format="json")
+    auth_api_client.cookies.clear()
+    _, queries = replica_queries(auth_api_client, url)
+
+    assert queries > 0
+
+
+@pytest.mark.django_db(transaction=True, databases=DATABASES)
+def test_router_writes_to_primary(replica):
+    """ Объект, прочитанный с реплики, сохраняется в default"""
+    baker.make("Products", name="реплика")
+    with replica_reads():
+        product = Products.objects.get()
+    assert product._state.db == "replica"
+    product.name = "основная"
+    with CaptureQueriesContext(connections["default"]) as primary:
+        product.save()
+
+    assert product._state.db == "default"
+    assert ReplicaRouter().db_for_write(ProductReviews, instance=product) == "default"
+    assert any(query["sql"].startswith("UPDATE") for query in primary.captured_queries)
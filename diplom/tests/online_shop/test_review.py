@@ -2,8 +2,11 @@ import random
 
 import pytest
 import rest_framework.status as status
+from django.core.management import call_command
 from django.urls import reverse
 
+from online_shop.models import Products, ProductReviews
+
 
 @pytest.mark.django_db
 def test_get_review(api_client, product_reviews_factory):
@@ -24,7 +27,7 @@ def test_list_review(api_client, product_reviews_factory):
     product_reviews_factory()
     url = reverse("product-reviews-list")
     resp = api_client.get(url)
-    resp_json = resp.json()
+    resp_json = resp.json()["results"]
 
     assert resp.status_code == status.HTTP_200_OK
     assert len(resp_json) == 5
@@ -37,7 +40,7 @@ def test_user_review(auth_api_client, product_reviews_factory):
     creator_id = random.choice(product_reviews).user_id
     url = reverse("product-reviews-list")
     resp = auth_api_client.get(url, data={"user": creator_id})
-    resp_json = resp.json()
+    resp_json = resp.json()["results"]
 
     assert resp.status_code == status.HTTP_200_OK
     # assert resp_json[0]["creator"] == creator_id
@@ -50,7 +53,7 @@ def test_date_create_review(auth_api_client, product_reviews_factory):
     date = random.choice(product_reviews).created_at
     url = reverse("product-reviews-list")
     resp = auth_api_client.get(url, data={"created_at": date})
-    resp_json = resp.json()
+    resp_json = resp.json()["results"]
 
     assert resp.status_code == status.HTTP_200_OK
     # assert resp_json[0]["created_at"] == date
@@ -63,7 +66,7 @@ def test_id_product_review(auth_api_client, product_reviews_factory):
     product_id = random.choice(product_reviews).product_id.id
     url = reverse("product-reviews-list")
     resp = auth_api_client.get(url, data={"product_id": product_id})
-    resp_json = resp.json()
+    resp_json = resp.json()["results"]
 
     assert resp.status_code == status.HTTP_200_OK
     # assert resp_json[0]["product_id"] == product_id
@@ -145,3 +148,101 @@ def test_delete_review_not_auth(api_client, product_reviews_factory, user):
 
     assert resp.status_code == status.HTTP_401_UNAUTHORIZED
     # assert product_reviews[index].id in reviews_id
+
+
+@pytest.mark.django_db
+def test_review_updates_product_rating(auth_api_client, products_factory):
+    """ Рейтинг товара пересчитывается при создании, изменении и удалении отзыва"""
+    product = products_factory()[0]
+    url = reverse("product-reviews-list")
+
+    resp = auth_api_client.post(url, data={"text": "отзыв", "rate": 4, "product_id": product.id}, format="json")
+    product.refresh_from_db()
+    assert resp.status_code == status.HTTP_201_CREATED
+    assert (product.rating_count, product.rating_avg) == (1, 4)
+
+    detail_url = reverse("product-reviews-detail", args=[resp.json()["id"]])
+    resp = auth_api_client.patch(detail_url, data={"rate": 1}, format="json")
+    product.refresh_from_db()
+    assert resp.status_code == status.HTTP_200_OK
+    assert (product.rating_count, product.rating_avg) == (1, 1)
+
+    resp = auth_api_client.delete(detail_url)
+    product.refresh_from_db()
+    assert resp.status_code == status.HTTP_204_NO_CONTENT
+    assert (product.rating_count, product.rating_avg) == (0, 0)
+
+
+@pytest.mark.django_db
+def test_rebuild_ratings_command(product_reviews_factory):
+    """ Пересчёт рейтингов командой rebuild_ratings"""
+    reviews = product_reviews_factory(rate=3)
+    call_command("rebuild_ratings")
+    product = Products.objects.get(id=reviews[0].product_id_id)
+
+    assert product.rating_count == 1
+    assert product.rating_avg == 3
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("reviews_count", [2, 20])
+def test_bulk_create_review_num_queries(auth_api_client, products_factory, django_assert_num_queries, reviews_count):
+    """ Массовое создание отзывов фиксированным числом запросов"""
+    products = products_factory(_quantity=reviews_count)
+    url = reverse("product-reviews-bulk")
+    data = [{"text": "отзыв", "rate": 5, "product_id": product.id} for product in products]
+
+    with django_assert_num_queries(7):
+        resp = auth_api_client.post(url, data=data, format="json")
+
+    assert resp.status_code == status.HTTP_201_CREATED
+    assert len(resp.json()) == reviews_count
+    assert set(Products.objects.values_list("rating_count", "rating_avg")) == {(1, 5)}
+
+
+@pytest.mark.django_db
+def test_bulk_create_review_duplicates(auth_api_client, products_factory, user):
+    """ Дубликаты отзывов в пачке и в базе отклоняются по элементам"""
+    products = products_factory()
+    ProductReviews.objects.create(user=user, product_id=products[0], text="старый", rate=3)
+    url = reverse("product-reviews-bulk")
+    data = [
+        {"text": "отзыв", "rate": 5, "product_id": products[0].id},
+        {"text": "отзыв", "rate": 5, "product_id": products[1].id},
+        {"text": "отзыв", "rate": 4, "product_id": products[1].id},
+    ]
+    resp = auth_api_client.post(url, data=data, format="json")
+    errors = resp.json()
+
+    assert resp.status_code == status.HTTP_400_BAD_REQUEST
+    assert [bool(error) for error in errors] == [True, False, True]
+    assert ProductReviews.objects.count() == 1
+
+
+@pytest.mark.django_db
+def test_bulk_update_review_foreign(auth_api_client, django_user_model, products_factory):
+    """ Массово изменить можно только свои отзывы"""
+    other = django_user_model.objects.create(username="other")
+    review = ProductReviews.objects.create(user=other, product_id=products_factory()[0], text="чужой", rate=3)
+    url = reverse("product-reviews-bulk")
+    resp = auth_api_client.patch(url, data=[{"id": review.id, "text": "изменён"}], format="json")
+
+    assert resp.status_code == status.HTTP_403_FORBIDDEN
+
+
+@pytest.mark.django_db
+def test_create_review_duplicate(auth_api_client, products_factory, django_assert_num_queries):
+    """ Повторный отзыв отклоняется ограничением БД без отдельной проверки"""
+    product = products_factory()[0]
+    url = reverse("product-reviews-list")
+    data = {"text": "отзыв", "rate": 5, "product_id": product.id}
+
+    with django_assert_num_queries(6):
+        first = auth_api_client.post(url, data=data, format="json")
+    second = auth_api_client.post(url, data=data, format="json")
+    product.refresh_from_db()
+
+    assert first.status_code == status.HTTP_201_CREATED
+    assert second.status_code == status.HTTP_400_BAD_REQUEST
+    assert second.json() == ["Нельзя оставлять более одного отзыва к каждому товару"]
+    assert product.rating_count == 1
@@ -0,0 +1,65 @@
+import importlib
+import sys
+
+import pytest
+from django.core.exceptions import ImproperlyConfigured
+
+PRODUCTION_ENV = {
+    'DJANGO_SECRET_KEY': 'secret',
+    'DJANGO_ALLOWED_HOSTS': 'shop.example.com,api.example.com',
+    'REDIS_URL': 'redis://127.0.0.1:6379/0',
+}
+
+
+@pytest.fixture
+def load_production(monkeypatch):
+    def load(**env):
+        for name, value in env.items():
+            if value is None:
+                monkeypatch.delenv(name, raising=False)
+            else:
+                monkeypatch.setenv(name, value)
+        sys.modules.pop('diplom.settings.production', None)
+        return importlib.import_module('diplom.settings.production')
+
+    yield load
+    sys.modules.pop('diplom.settings.production', None)
+
+
+def test_production_profile(load_production):
+    """ Продакшен-профиль: без DEBUG, только JSON, кешированные шаблоны и общий кеш"""
+    production = load_production(**PRODUCTION_ENV)
+
+    assert production.DEBUG is False
+    assert production.ALLOWED_HOSTS == ['shop.example.com', 'api.example.com']
+    assert production.REST_FRAMEWORK['DEFAULT_RENDERER_CLASSES'] == ['online_shop.renderers.FastJSONRenderer']
+    assert production.TEMPLATES[0]['OPTIONS']['loaders'][0][0] == 'django.template.loaders.cached.Loader'
+    assert production.CACHES['default']['LOCATION'] == PRODUCTION_ENV['REDIS_URL']
+    assert production.DATABASES['default']['CONN_MAX_AGE'] > 0
+
+
+def test_production_requires_secret_key(load_production):
+    """ Без секретного ключа продакшен-профиль не загружается"""
+    with pytest.raises(ImproperlyConfigured):
+        load_production(**{**PRODUCTION_ENV, 'DJANGO_SECRET_KEY': None})
+
+
+def test_production_does_not_touch_base(load_production):
+    """ Продакшен-профиль не меняет общие настройки"""
+    load_production(**PRODUCTION_ENV)
+    base = importlib.import_module('diplom.settings.base')
+
+    assert 'rest_framework.renderers.BrowsableAPIRenderer' in base.REST_FRAMEWORK['DEFAULT_RENDERER_CLASSES']
+    assert base.TEMPLATES[0]['APP_DIRS'] is True
+
+
+def test_production_is_default(load_production, monkeypatch):
+    """ Без DJANGO_ENV загружается продакшен-профиль, а не dev с DEBUG"""
+    load_production(**PRODUCTION_ENV, DJANGO_ENV=None, DJANGO_SETTINGS_MODULE='diplom.settings')
+    package = importlib.import_module('diplom')
+    monkeypatch.setattr(package, 'settings', package.settings)
+    monkeypatch.delitem(sys.modules, 'diplom.settings')
+    profile = importlib.import_module('diplom.settings')
+
+    assert profile.DJANGO_ENV == 'production'
+    assert profile.DEBUG is False
@@ -0,0 +1,111 @@
+import datetime
+
+import pytest
+from django.core.management import call_command
+from django.urls import reverse
+from django.utils import timezone
+import rest_framework.status as status
+from model_bakery import baker
+
+from online_shop.models import DailySales, Orders, ProductOrder, Products, ProductSalesDaily
+from online_shop.statistics import refresh_sales_statistics
+
+
+def make_order(user, items, days_ago=0):
+    """ Заказ с позициями [(товар, количество)], созданный days_ago дней назад"""
+    price_cart = sum(product.price * quantity for product, quantity in items)
+    order = baker.make("Orders", user=user, price_cart=price_cart, make_m2m=False)
+    ProductOrder.objects.bulk_create([ProductOrder(order=order, product=product, quantity=quantity,
+                                                   price=product.price)
+                                      for product, quantity in items])
+    if days_ago:
+        moment = timezone.now() - datetime.timedelta(days=days_ago)
+        Orders.objects.filter(pk=order.pk).update(created_at=moment, updated_at=moment)
+    return order
+
+
+@pytest.mark.django_db
+def test_statistics_endpoint(admin_api_client, user):
+    """ Лидеры продаж, выручка по дням и средний чек из сводных таблиц"""
+    bike = baker.make("Products", price=100)
+    helmet = baker.make("Products", price=10)
+    make_order(user, [(bike, 1), (helmet, 5)], days_ago=1)
+    make_order(user, [(helmet, 2)])
+    call_command("refresh_statistics")
+
+    resp = admin_api_client.get(reverse("statistics"))
+    resp_json = resp.json()
+
+    assert resp.status_code == status.HTTP_200_OK
+    assert resp_json["orders_count"] == 2
+    assert resp_json["revenue"] == 170
+    assert resp_json["average_order_value"] == 85
+    assert [(item["product"], item["quantity"], item["revenue"]) for item in resp_json["products"]] == \
+        [(helmet.id, 7, 70), (bike.id, 1, 100)]
+    assert [day["revenue"] for day in resp_json["days"]] == [150, 20]
+
+    by_revenue = admin_api_client.get(reverse("statistics"), {"sort": "revenue", "limit": 1}).json()
+    assert [item["product"] for item in by_revenue["products"]] == [bike.id]
+
+    today = admin_api_client.get(reverse("statistics"), {"date_from": timezone.localdate()}).json()
+    assert today["revenue"] == 20
+
+
+@pytest.mark.django_db
+def test_statistics_staff_only(auth_api_client):
+    """ Статистика доступна только персоналу"""
+    resp = auth_api_client.get(reverse("statistics"))
+
+    assert resp.status_code == status.HTTP_403_FORBIDDEN
+
+
+@pytest.mark.django_db
+def test_incremental_refresh_touches_changed_days_only(user):
+    """ Повторный пересчёт затрагивает только дни изменённых заказов"""
+    product = baker.make("Products", price=10)
+    old = make_order(user, [(product, 1)], days_ago=10)
+    refresh_sales_statistics()
+    old.refresh_from_db()
+    old_day = DailySales.objects.get(day=timezone.localdate(old.created_at))
+    DailySales.objects.filter(pk=old_day.pk).update(revenue=-1)
+
+    make_order(user, [(product, 3)])
+    assert refresh_sales_statistics() == 1
+
+    assert DailySales.objects.get(pk=old_day.pk).revenue == -1
+    assert DailySales.objects.get(day=timezone.localdate()).revenue == 30
+    assert ProductSalesDaily.objects.get(day=timezone.localdate()).quantity == 3
+
+
+@pytest.mark.django_db
+def test_deleted_order_refreshes_its_day(user):
+    """ Удаление заказа пересчитывает его день при следующем обновлении"""
+    product = baker.make("Products", price=10)
+    order = make_order(user, [(product, 1)], days_ago=3)
+    refresh_sales_statistics()
+    assert DailySales.objects.count() == 1
+
+    order.refresh_from_db()
+    order.delete()
+    refresh_sales_statistics()
+
+    assert DailySales.objects.count() == 0
+    assert ProductSalesDaily.objects.count() == 0
+
+
+@pytest.mark.django_db
+def test_price_change_between_refreshes(auth_api_client):
+    """ Выручка по товару считается по цене в заказе и сходится с выручкой дня после смены цены"""
+    product = baker.make("Products", price=100)
+    url = reverse("orders-list")
+    auth_api_client.post(url, data={"positions": [{"product": product.id, "quantity": 1}]}, format="json")
+    refresh_sales_statistics()
+
+    Products.objects.filter(pk=product.pk).update(price=150)
+    auth_api_client.post(url, data={"positions": [{"product": product.id, "quantity": 2}]}, format="json")
+    refresh_sales_statistics()
+    incremental = ProductSalesDaily.objects.get(day=timezone.localdate()).revenue
+    refresh_sales_statistics(full=True)
+
+    assert incremental == ProductSalesDaily.objects.get(day=timezone.localdate()).revenue == 400
+    assert DailySales.objects.get(day=timezone.localdate()).revenue == 400
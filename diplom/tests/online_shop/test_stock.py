@@ -0,0 +1,152 @@
+import threading
+import time
+
+import pytest
+from django.db import OperationalError, connection, transaction
+from django.urls import reverse
+import rest_framework.status as status
+from model_bakery import baker
+from rest_framework import serializers
+
+from online_shop.caching import get_catalogue_version
+from online_shop.models import Orders, ProductOrder
+from online_shop.stock import reserve_stock
+
+
+@pytest.mark.django_db
+def test_order_reserves_stock(auth_api_client):
+    """ Создание заказа списывает остатки, товары без учёта остатка не меняются"""
+    tracked = baker.make("Products", price=10, stock=5)
+    untracked = baker.make("Products", price=10)
+    url = reverse("orders-list")
+    resp = auth_api_client.post(url, data={"positions": [{"product": tracked.id, "quantity": 3},
+                                                         {"product": untracked.id, "quantity": 7}]},
+                                format="json")
+    tracked.refresh_from_db()
+    untracked.refresh_from_db()
+
+    assert resp.status_code == status.HTTP_201_CREATED
+    assert tracked.stock == 2
+    assert untracked.stock is None
+
+
+@pytest.mark.django_db
+def test_order_out_of_stock(auth_api_client):
+    """ При нехватке хотя бы одного товара заказ не создаётся и остатки не меняются"""
+    first = baker.make("Products", price=10, stock=5)
+    second = baker.make("Products", price=10, stock=1)
+    url = reverse("orders-list")
+    resp = auth_api_client.post(url, data={"positions": [{"product": first.id, "quantity": 3},
+                                                         {"product": second.id, "quantity": 2}]},
+                                format="json")
+    first.refresh_from_db()
+
+    assert resp.status_code == status.HTTP_400_BAD_REQUEST
+    assert Orders.objects.count() == 0
+    assert first.stock == 5
+
+
+@pytest.mark.django_db
+def test_order_update_reserves_difference(auth_api_client, user):
+    """ Изменение количества в заказе списывает или возвращает только разницу"""
+    product = baker.make("Products", price=10, stock=5)
+    order = baker.make("Orders", price_cart=10, user=user, make_m2m=False)
+    ProductOrder.objects.create(order=order, product=product, quantity=1, price=product.price)
+    url = reverse("orders-detail", args=[order.id])
+
+    auth_api_client.patch(url, data={"positions": [{"product": product.id, "quantity": 4}]}, format="json")
+    product.refresh_from_db()
+    assert product.stock == 2
+
+    auth_api_client.patch(url, data={"positions": [{"product": product.id, "quantity": 2}]}, format="json")
+    product.refresh_from_db()
+    assert product.stock == 4
+
+
+@pytest.mark.django_db
+def test_order_cancel_releases_stock(auth_api_client, user):
+    """ Удаление незавершённого заказа возвращает товар на склад"""
+    product = baker.make("Products", price=10, stock=0)
+    order = baker.make("Orders", price_cart=30, user=user, make_m2m=False)
+    ProductOrder.objects.create(order=order, product=product, quantity=3, price=product.price)
+    resp = auth_api_client.delete(reverse("orders-detail", args=[order.id]))
+    product.refresh_from_db()
+
+    assert resp.status_code == status.HTTP_204_NO_CONTENT
+    assert product.stock == 3
+
+
+@pytest.mark.django_db(transaction=True)
+def test_concurrent_orders_never_oversell():
+    """ Конкурентные списания одного товара из многих потоков не уводят остаток в минус"""
+    product = baker.make("Products", price=10, stock=10)
+    threads_count = 40
+    barrier = threading.Barrier(threads_count)
+    results = []
+
+    def buy():
+        barrier.wait()
+        try:
+            for _ in range(100):
+                try:
+                    with transaction.atomic():
+                        reserve_stock({product.id: 1})
+                    results.append(True)
+                    return
+                except serializers.ValidationError:
+                    results.append(False)
+                    return
+                except OperationalError:
+                    # SQLite блокирует таблицу целиком — повторяем попытку
+                    time.sleep(0.01)
+        finally:
+            connection.close()
+
+    threads = [threading.Thread(target=buy) for _ in range(threads_count)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    product.refresh_from_db()
+
+    assert results.count(True) == 10
+    assert results.count(False) == threads_count - 10
+    assert product.stock == 0
+
+
+@pytest.mark.django_db
+def test_order_refreshes_cached_product(auth_api_client, django_capture_on_commit_callbacks):
+    """ После заказа карточка товара отдаёт новый остаток, а не кеш или 304"""
+    product = baker.make("Products", price=10, stock=5)
+    url = reverse("products-detail", args=[product.id])
+    first = auth_api_client.get(url)
+
+    with django_capture_on_commit_callbacks(execute=True):
+        auth_api_client.post(reverse("orders-list"), data={"positions": [{"product": product.id, "quantity": 2}]},
+                             format="json")
+    cached = auth_api_client.get(url, HTTP_IF_NONE_MATCH=first['ETag'])
+    second = auth_api_client.get(url)
+
+    assert first.json()['stock'] == 5
+    assert cached.status_code == status.HTTP_200_OK
+    assert second.json()['stock'] == 3
+    assert second['ETag'] != first['ETag']
+
+
+@pytest.mark.django_db
+def test_untracked_order_keeps_catalogue(auth_api_client, django_capture_on_commit_callbacks):
+    """ Заказ и отмена товаров без учёта остатка не трогают updated_at и версию каталога"""
+    product = baker.make("Products", price=10)
+    updated_at = product.updated_at
+    version = get_catalogue_version()
+
+    with django_capture_on_commit_callbacks(execute=True):
+        resp = auth_api_client.post(reverse("orders-list"),
+                                    data={"positions": [{"product": product.id, "quantity": 2}]}, format="json")
+    with django_capture_on_commit_callbacks(execute=True):
+        auth_api_client.delete(reverse("orders-detail", args=[resp.json()["id"]]))
+    product.refresh_from_db()
+
+    assert resp.status_code == status.HTTP_201_CREATED
+    assert product.updated_at == updated_at
+    assert get_catalogue_version() == version